@@ -0,0 +1,102 @@
+"""
+
+Benchmarks for combining csv files and converting Excel files. Runs with `asv run` or without asv using `python -m benchmarks.run`
+
+"""
+
+import os
+import shutil
+import tempfile
+
+from d6tstack.combine_csv import CombinerCSV
+from d6tstack.sniffer import csv_count_rows
+from d6tstack.convert_xls import XLStoCSVMultiFile
+
+from .datagen import generate_files, generate_xls_files
+
+# dataset size, override with env vars to benchmark larger data
+N_FILES = int(os.environ.get('D6TSTACK_BENCH_FILES', 10))
+N_ROWS = int(os.environ.get('D6TSTACK_BENCH_ROWS', 20000))
+N_COLS = int(os.environ.get('D6TSTACK_BENCH_COLS', 20))
+DATA_DIR = os.path.abspath(os.environ.get('D6TSTACK_BENCH_DIR', 'bench-data'))
+
+DATASETS = {
+    'clean': {},
+    'drift': {'drift': 0.3, 'renames': 0.2},
+    'wide-strings': {'str_width': 64},
+    'gzip': {'compression': 'gzip'},
+}
+
+
+def _dataset_dir(name):
+    return os.path.join(DATA_DIR, '{}-{}x{}x{}'.format(name, N_FILES, N_ROWS, N_COLS))
+
+
+class CombineCSV:
+    params = list(DATASETS)
+    param_names = ['dataset']
+    timeout = 600
+
+    def setup_cache(self):
+        return dict((name, generate_files(_dataset_dir(name), N_FILES, N_ROWS, N_COLS, **cfg)) for name, cfg in DATASETS.items())
+
+    def setup(self, files, dataset):
+        self.fname_list, self.columns_rename = files[dataset]
+        self.output_dir = tempfile.mkdtemp()
+
+    def teardown(self, files, dataset):
+        shutil.rmtree(self.output_dir)
+
+    def combiner(self):
+        return CombinerCSV(self.fname_list, columns_rename=self.columns_rename or None, log=False)
+
+    def time_sniff_columns(self, files, dataset):
+        self.combiner().sniff_columns()
+
+    def time_to_pandas(self, files, dataset):
+        self.combiner().to_pandas()
+
+    def peakmem_to_pandas(self, files, dataset):
+        self.combiner().to_pandas()
+
+    def time_to_csv_combine(self, files, dataset):
+        self.combiner().to_csv_combine(os.path.join(self.output_dir, 'combined.csv'))
+
+    def time_to_parquet_combine(self, files, dataset):
+        self.combiner().to_parquet_combine(os.path.join(self.output_dir, 'combined.pq'))
+
+    def time_to_sql_combine_sqlite(self, files, dataset):
+        uri = 'sqlite:///' + os.path.join(self.output_dir, 'combined.db')
+        self.combiner().to_sql_combine(uri, 'combined', if_exists='replace')
+
+    def time_to_sqlite_combine(self, files, dataset):
+        self.combiner().to_sqlite_combine(os.path.join(self.output_dir, 'combined.db'), 'combined', if_exists='replace')
+
+
+class CountRows:
+    timeout = 600
+
+    def setup_cache(self):
+        return generate_files(_dataset_dir('clean'), N_FILES, N_ROWS, N_COLS)[0]
+
+    def time_csv_count_rows(self, fname_list):
+        for fname in fname_list:
+            csv_count_rows(fname)
+
+
+class ConvertXLS:
+    timeout = 600
+
+    def setup_cache(self):
+        return generate_xls_files(os.path.join(DATA_DIR, 'xls-{}x{}x{}'.format(N_FILES, N_ROWS // 10, N_COLS)),
+                                  N_FILES, N_ROWS // 10, N_COLS)
+
+    def setup(self, fname_list):
+        self.output_dir = tempfile.mkdtemp()
+
+    def teardown(self, fname_list):
+        shutil.rmtree(self.output_dir)
+
+    def time_xls_to_csv_multifile(self, fname_list):
+        XLStoCSVMultiFile(fname_list, cfg_xls_sheets_sel_mode='idx_global', cfg_xls_sheets_sel=0,
+                          output_dir=self.output_dir, if_exists='replace').convert_all(skiprows=2)
@@ -0,0 +1,113 @@
+"""
+
+Synthetic multi-file datasets for benchmarks. Files share a base schema with configurable column drift, renamed columns, string widths and compression, similar to vendor files which change over time
+
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def generate_df(n_rows, n_cols, str_width=8, seed=0):
+    """
+    Dataframe with a date column and a mix of int, float and string columns
+
+    Args:
+        n_rows (int): number of rows
+        n_cols (int): number of columns besides the date column
+        str_width (int): length of string values
+        seed (int): random seed
+
+    Returns:
+        dataframe: random data with columns `date`, `col000`, `col001`, ...
+    """
+    rng = np.random.RandomState(seed)
+    data = {'date': pd.date_range('2010-01-01', periods=n_rows, freq='min').strftime('%Y-%m-%d %H:%M:%S')}
+    letters = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+    for i in range(n_cols):
+        col = 'col{:03d}'.format(i)
+        if i % 3 == 0:
+            data[col] = rng.randint(0, 1000000, n_rows)
+        elif i % 3 == 1:
+            data[col] = rng.rand(n_rows).round(6)
+        else:
+            # small pool of values so strings don't dominate generation time
+            pool = [''.join(rng.choice(letters, str_width)) for _ in range(100)]
+            data[col] = np.array(pool)[rng.randint(0, len(pool), n_rows)]
+    return pd.DataFrame(data)
+
+
+def generate_files(output_dir, n_files=10, n_rows=10000, n_cols=10, drift=0., renames=0., str_width=8,
+                   compression=None, seed=0):
+    """
+    Writes csv files with the same base schema. Files get generated once, existing files are reused
+
+    Args:
+        output_dir (str): directory to write files to
+        n_files (int): number of files
+        n_rows (int): rows per file
+        n_cols (int): columns per file besides the date column
+        drift (float): share of columns which drift between files. Drifting columns are missing from some files and every file adds one new column
+        renames (float): share of columns which get a different name in the second half of the files, eg `col001` becomes `Col 001`
+        str_width (int): length of string values
+        compression (str): {None, 'gzip', 'bz2', 'zip', 'xz'}, file compression
+        seed (int): random seed
+
+    Returns:
+        tuple: list of file paths, dict of renames to pass as `columns_rename` to undo the renames
+    """
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    rng = np.random.RandomState(seed)
+    columns = ['col{:03d}'.format(i) for i in range(n_cols)]
+    columns_drift = list(rng.choice(columns, int(round(drift * n_cols)), replace=False))
+    columns_renamed = list(rng.choice(columns, int(round(renames * n_cols)), replace=False))
+    columns_rename = dict(('Col ' + c[3:], c) for c in columns_renamed)
+    ext = {None: '.csv', 'gzip': '.csv.gz', 'bz2': '.csv.bz2', 'zip': '.csv.zip', 'xz': '.csv.xz'}[compression]
+
+    fname_list = []
+    for ifile in range(n_files):
+        fname = os.path.join(output_dir, 'data-{:04d}{}'.format(ifile, ext))
+        fname_list.append(fname)
+        if os.path.exists(fname):
+            continue
+        df = generate_df(n_rows, n_cols + 1, str_width, seed=seed + ifile)
+        df = df.rename(columns={'col{:03d}'.format(n_cols): 'new{:04d}'.format(ifile)})
+        columns_drop = [c for c in columns_drift if rng.rand() < 0.5]
+        df = df.drop(columns=columns_drop)
+        if ifile >= n_files // 2:
+            df = df.rename(columns=dict((v, k) for k, v in columns_rename.items()))
+        df.to_csv(fname, index=False, compression=compression)
+
+    return fname_list, columns_rename
+
+
+def generate_xls_files(output_dir, n_files=5, n_rows=1000, n_cols=10, seed=0):
+    """
+    Writes xlsx files with a title block above the data like many Excel reports
+
+    Args:
+        output_dir (str): directory to write files to
+        n_files (int): number of files
+        n_rows (int): rows per file
+        n_cols (int): columns per file besides the date column
+        seed (int): random seed
+
+    Returns:
+        list: file paths
+    """
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    fname_list = []
+    for ifile in range(n_files):
+        fname = os.path.join(output_dir, 'data-{:04d}.xlsx'.format(ifile))
+        fname_list.append(fname)
+        if os.path.exists(fname):
+            continue
+        df = generate_df(n_rows, n_cols, seed=seed + ifile)
+        with pd.ExcelWriter(fname) as writer:
+            pd.DataFrame([['report {}'.format(ifile)]]).to_excel(writer, sheet_name='Sheet1', header=False, index=False)
+            df.to_excel(writer, sheet_name='Sheet1', startrow=2, index=False)
+    return fname_list
@@ -0,0 +1,141 @@
+"""
+
+Runs the benchmarks without asv and stores results as json so runs of different versions can be compared
+
+    python -m benchmarks.run --output bench-results/new.json --compare bench-results/old.json
+
+"""
+
+import argparse
+import datetime
+import importlib
+import inspect
+import itertools
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+BENCH_MODULES = ['benchmarks.bench_combine']
+
+
+def _environment():
+    import numpy as np
+    import pandas as pd
+    env = {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__}
+    try:
+        import pyarrow
+        env['pyarrow'] = pyarrow.__version__
+    except ImportError:
+        pass
+    try:
+        env['commit'] = subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        env['commit'] = None
+    return env
+
+
+def _measure(fun, args, repeat):
+    if fun.__name__.startswith('peakmem_'):
+        tracemalloc.start()
+        try:
+            fun(*args)
+            return [tracemalloc.get_traced_memory()[1]]
+        finally:
+            tracemalloc.stop()
+    times = []
+    for _ in range(repeat):
+        time_start = time.perf_counter()
+        fun(*args)
+        times.append(time.perf_counter() - time_start)
+    return times
+
+
+def run_benchmarks(pattern=None, repeat=3):
+    """
+    Runs benchmark classes the same way asv does: `setup_cache()` once per class, `setup()` and `teardown()` around each benchmark
+
+    Args:
+        pattern (str): regex to select benchmarks by `Class.method` name
+        repeat (int): number of timing runs per benchmark
+
+    Returns:
+        dict: benchmark name, dict of params, results
+    """
+    results = {}
+    for module_name in BENCH_MODULES:
+        module = importlib.import_module(module_name)
+        for cls_name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__:
+                continue
+            methods = [m for m in dir(cls) if m.startswith(('time_', 'peakmem_'))
+                       and (pattern is None or re.search(pattern, '{}.{}'.format(cls_name, m)))]
+            if not methods:
+                continue
+            bench = cls()
+            cache = [bench.setup_cache()] if hasattr(bench, 'setup_cache') else []
+            params = getattr(cls, 'params', [])
+            params = list(itertools.product(*params)) if params and isinstance(params[0], list) else [(p,) for p in params] or [()]
+            for method in methods:
+                name = '{}.{}'.format(cls_name, method)
+                results[name] = {}
+                for param in params:
+                    args = cache + list(param)
+                    if hasattr(bench, 'setup'):
+                        bench.setup(*args)
+                    try:
+                        values = _measure(getattr(bench, method), args, repeat)
+                    finally:
+                        if hasattr(bench, 'teardown'):
+                            bench.teardown(*args)
+                    key = ','.join(str(p) for p in param) or '-'
+                    results[name][key] = {'min': min(values), 'median': statistics.median(values), 'n': len(values)}
+                    print('{:<50} {:<15} {:>12.4g}'.format(name, key, results[name][key]['median']))
+    return results
+
+
+def compare(results, results_base, factor=1.1):
+    """
+    Prints ratio of new to base results, flags benchmarks which got slower by more than `factor`
+    """
+    for name, values in sorted(results.items()):
+        for key, value in sorted(values.items()):
+            base = results_base.get(name, {}).get(key)
+            if not base:
+                continue
+            ratio = value['median'] / max(base['median'], 1e-12)
+            flag = 'SLOWER' if ratio > factor else 'faster' if ratio < 1 / factor else ''
+            print('{:<50} {:<15} {:>8.2f}x {}'.format(name, key, ratio, flag))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run d6tstack benchmarks')
+    parser.add_argument('--bench', help='regex to select benchmarks, eg "to_pandas"')
+    parser.add_argument('--repeat', type=int, default=3, help='timing runs per benchmark')
+    parser.add_argument('--output', help='json file to store results, default bench-results/<time>-<commit>.json')
+    parser.add_argument('--compare', help='json file of an earlier run to compare against')
+    args = parser.parse_args()
+
+    env = _environment()
+    results = run_benchmarks(args.bench, args.repeat)
+    output = args.output or os.path.join('bench-results', '{}-{}.json'.format(
+        datetime.datetime.now().strftime('%Y%m%d-%H%M%S'), (env['commit'] or 'nocommit')[:8]))
+    if os.path.dirname(output) and not os.path.exists(os.path.dirname(output)):
+        os.makedirs(os.path.dirname(output))
+    from .bench_combine import N_FILES, N_ROWS, N_COLS
+    with open(output, 'w') as fhandle:
+        json.dump({'environment': env, 'config': {'files': N_FILES, 'rows': N_ROWS, 'cols': N_COLS},
+                   'results': results}, fhandle, indent=2)
+    print('results saved to ' + output)
+
+    if args.compare:
+        with open(args.compare) as fhandle:
+            compare(results, json.load(fhandle)['results'])
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,4 @@
+import d6tstack.cache
 import d6tstack.combine_csv
 #import d6tstack.convert_xls
 import d6tstack.sniffer
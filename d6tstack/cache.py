@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+
+Persistent caches keyed by file path, size and modification time so unchanged files don't need to be read again
+
+"""
+
+import os
+import io
+import json
+import hashlib
+import sqlite3
+import contextlib
+
+import pandas as pd
+
+
+def file_fingerprint(fname):
+    """Fingerprint of a file to check if it has changed
+
+    Args:
+        fname (str): file path
+
+    Returns:
+        tuple: file size, modification time in ns
+    """
+    stat = os.stat(fname)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def params_key(params):
+    """Hash of settings that determine what gets cached, eg `read_csv_params`
+
+    Args:
+        params (dict): settings
+
+    Returns:
+        str: hash of settings
+    """
+    return hashlib.md5(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class SniffCache(object):
+    """
+
+    Caches columns and preview rows from `CombinerCSV.sniff_columns()` in a sqlite database. Entries are only used if the file path, size, modification time and sniff settings are unchanged
+
+    Args:
+        fname (str): path to sqlite database, gets created if it doesn't exist
+        params (dict): sniff settings, eg `read_csv_params`
+
+    """
+
+    def __init__(self, fname, params):
+        self.fname = fname
+        self.key = params_key(params)
+        fdir = os.path.dirname(fname)
+        if fdir and not os.path.exists(fdir):
+            os.makedirs(fdir)
+        with contextlib.closing(sqlite3.connect(self.fname)) as cnxn, cnxn:
+            cnxn.execute("""CREATE TABLE IF NOT EXISTS sniff (
+                path TEXT NOT NULL,
+                params TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime INTEGER NOT NULL,
+                columns TEXT NOT NULL,
+                preview TEXT,
+                PRIMARY KEY (path, params)
+            );""")
+
+    def get(self, fname_list):
+        """
+
+        Loads cached results for files which haven't changed
+
+        Args:
+            fname_list (list): file paths
+
+        Returns:
+            dict: filename, (columns, preview dataframe or None if preview was not cached)
+
+        """
+        with contextlib.closing(sqlite3.connect(self.fname)) as cnxn, cnxn:
+            rows = cnxn.execute('SELECT path, size, mtime, columns, preview FROM sniff WHERE params=?', (self.key,)).fetchall()
+        rows = {path: (size, mtime, columns, preview) for path, size, mtime, columns, preview in rows}
+
+        cached = {}
+        for fname in fname_list:
+            row = rows.get(os.path.abspath(fname))
+            if row is None or row[:2] != file_fingerprint(fname):
+                continue
+            columns = json.loads(row[2])
+            df = None
+            if row[3] is not None:
+                df = pd.read_json(io.StringIO(row[3]), orient='split', dtype=False, convert_axes=False, convert_dates=False)
+                df.columns = columns
+            cached[fname] = (columns, df)
+        return cached
+
+    def put(self, items):
+        """
+
+        Stores results
+
+        Args:
+            items (dict): filename, (columns, preview dataframe or None)
+
+        """
+        rows = []
+        for fname, (columns, df) in items.items():
+            size, mtime = file_fingerprint(fname)
+            preview = None if df is None else df.to_json(orient='split')
+            rows.append((os.path.abspath(fname), self.key, size, mtime, json.dumps(columns, default=str), preview))
+        with contextlib.closing(sqlite3.connect(self.fname)) as cnxn, cnxn:
+            cnxn.executemany('INSERT OR REPLACE INTO sniff VALUES (?,?,?,?,?,?)', rows)
+
+
+class IngestManifest(object):
+    """
+
+    Keeps track of files which have already been combined into an output so only new files need to be processed. Stored as json
+
+    Args:
+        fname (str): path to manifest file, gets created on first update
+
+    """
+
+    def __init__(self, fname):
+        self.fname = fname
+        self.columns = None
+        self.files = {}
+        if os.path.exists(fname):
+            with open(fname) as fhandle:
+                manifest = json.load(fhandle)
+            self.columns = manifest['columns']
+            self.files = {k: tuple(v) for k, v in manifest['files'].items()}
+
+    def diff(self, fname_list):
+        """
+
+        Compares files against manifest
+
+        Args:
+            fname_list (list): file paths
+
+        Returns:
+            tuple: list of new files, list of files which changed since they were processed
+
+        """
+        fname_new, fname_changed = [], []
+        for fname in fname_list:
+            fingerprint = self.files.get(os.path.abspath(fname))
+            if fingerprint is None:
+                fname_new.append(fname)
+            elif fingerprint != file_fingerprint(fname):
+                fname_changed.append(fname)
+        return fname_new, fname_changed
+
+    def update(self, fname_list, columns):
+        """
+
+        Records files as processed
+
+        Args:
+            fname_list (list): file paths
+            columns (list): output columns
+
+        """
+        self.columns = list(columns)
+        self.files.update({os.path.abspath(fname): file_fingerprint(fname) for fname in fname_list})
+        fdir = os.path.dirname(self.fname)
+        if fdir and not os.path.exists(fdir):
+            os.makedirs(fdir)
+        with open(self.fname + '.tmp', 'w') as fhandle:
+            json.dump({'columns': self.columns, 'files': self.files}, fhandle, default=str)
+        os.replace(self.fname + '.tmp', self.fname)
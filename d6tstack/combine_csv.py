@@ -7,12 +7,23 @@ import ntpath, pathlib
 import copy
 import itertools
 import os
+import concurrent.futures
+import functools
+import csv
+import glob
+import queue
+import threading
+import shutil
+import io
+import sys
+import time
 
 import d6tcollect
 # d6tcollect.init(__name__)
 
 from .helpers import *
-from .utils import PrintLogger
+from .utils import PrintLogger, CombineStats, logger_hooks
+from .cache import SniffCache, IngestManifest
 
 
 # ******************************************************************
@@ -21,6 +32,386 @@ from .utils import PrintLogger
 def _dfconact(df):
     return pd.concat(itertools.chain.from_iterable(df), sort=False, copy=False, join='inner', ignore_index=True)
 
+def _map_workers(fun, iterable, n_workers=None):
+    # runs fun on each item in a process pool, results are returned in input order
+    if not n_workers or n_workers == 1:
+        return [fun(item) for item in iterable]
+    iterable = list(iterable)
+    chunksize = max(1, len(iterable) // (n_workers * 4))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=n_workers) as executor:
+        return list(executor.map(fun, iterable, chunksize=chunksize))
+
+# read_csv params the header tokenizer understands, anything else falls back to pandas
+_read_csv_header_params = ['sep', 'chunksize', 'encoding', 'quotechar', 'header', 'dtype', 'nrows']
+
+_compression_exts = ('.gz', '.bz2', '.zip', '.xz', '.zst')
+_compression_magic = (b'\x1f\x8b', b'BZh', b'PK\x03\x04', b'\xfd7zXZ\x00', b'\x28\xb5\x2f\xfd')
+
+def _is_compressed(fname):
+    # compressed by extension, which pandas uses to infer compression, or by magic bytes
+    if str(fname).lower().endswith(_compression_exts):
+        return True
+    with open(fname, 'rb') as fhandle:
+        return fhandle.read(6).startswith(_compression_magic)
+
+def _read_csv_header(fname, read_csv_params):
+    # tokenize first line of file to get columns. returns None if pandas is needed to read the header
+    if not isinstance(fname, (str, pathlib.PurePath)):
+        return None
+    if not set(read_csv_params.keys()).issubset(_read_csv_header_params):
+        return None
+    sep = read_csv_params.get('sep', ',')
+    if read_csv_params.get('header', 'infer') not in ['infer', 0] or not isinstance(sep, str) or len(sep) != 1:
+        return None
+    if str(fname).lower().endswith(_compression_exts):
+        return None
+
+    encoding = read_csv_params.get('encoding') or 'utf-8'
+    if encoding.lower().replace('_', '-') in ['utf-8', 'utf8']:
+        encoding = 'utf-8-sig' # pandas strips BOM
+    try:
+        with open(fname, newline='', encoding=encoding) as fhandle:
+            reader = csv.reader(fhandle, delimiter=sep, quotechar=read_csv_params.get('quotechar', '"'))
+            columns = next((row for row in reader if row), None) # pandas skips blank lines
+    except (UnicodeDecodeError, csv.Error):
+        return None
+
+    # pandas renames blank and duplicate columns
+    if not columns or '' in columns or len(set(columns)) != len(columns):
+        return None
+    return columns
+
+# read_csv params the pyarrow engine understands
+_read_csv_pyarrow_params = ['sep', 'chunksize', 'nrows', 'header', 'names', 'encoding', 'quotechar', 'usecols', 'dtype', 'skiprows']
+
+def _pyarrow_type(dtype):
+    import pyarrow as pa
+    if dtype in [str, object, 'str', 'object']:
+        return pa.string()
+    return pa.from_numpy_dtype(np.dtype(dtype))
+
+def _arrow_to_pandas(table):
+    import pyarrow as pa
+    # dates which were only found after the first block, cast back to strings
+    for i, field in enumerate(table.schema):
+        if pa.types.is_date(field.type) or pa.types.is_timestamp(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+    return table.to_pandas()
+
+def _read_csv_pyarrow(fname, read_csv_params, row_filter=None):
+    # yields dataframes of chunksize rows using multithreaded pyarrow csv parser
+    # row_filter: (pyarrow expression, dict of source column: name used in expression, names missing in file) to filter before converting to pandas
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    params_invalid = set(read_csv_params.keys()).difference(_read_csv_pyarrow_params)
+    if params_invalid:
+        raise ValueError('read_csv_params {} not supported by pyarrow engine, use read_engine="pandas"'.format(sorted(params_invalid)))
+    header = read_csv_params.get('header', 'infer')
+    if header not in ['infer', 0, None]:
+        raise ValueError('pyarrow engine only supports header=0 or header=None')
+    names = read_csv_params.get('names')
+    if names is not None and header == 'infer':
+        header = None
+    skiprows = read_csv_params.get('skiprows') or 0
+    if not isinstance(skiprows, int):
+        raise ValueError('pyarrow engine only supports integer skiprows')
+    if header == 0 and names is not None:
+        skiprows += 1 # replace header with names
+
+    read_options = pacsv.ReadOptions(use_threads=True, skip_rows=skiprows,
+                                     encoding=read_csv_params.get('encoding') or 'utf8',
+                                     column_names=names, autogenerate_column_names=header is None and names is None)
+    parse_options = pacsv.ParseOptions(delimiter=read_csv_params.get('sep', ','),
+                                       quote_char=read_csv_params.get('quotechar', '"'))
+    convert_options = pacsv.ConvertOptions(strings_can_be_null=True)
+    dtype = read_csv_params.get('dtype')
+    if isinstance(dtype, dict):
+        if header is None and names is None:
+            dtype = {'f{}'.format(k) if isinstance(k, int) else k: v for k, v in dtype.items()} # autogenerated names
+        convert_options.column_types = {k: _pyarrow_type(v) for k, v in dtype.items()}
+    elif dtype is not None:
+        convert_options.column_types = _read_csv_pyarrow_dtype_all(fname, read_options, parse_options, dtype)
+    usecols = read_csv_params.get('usecols')
+    if usecols is not None and all(isinstance(c, str) for c in usecols):
+        # skip converting other columns. pyarrow returns them in usecols order, pandas in file order
+        columns_file = names if names is not None else None if read_csv_params.get('skiprows') else \
+            _read_csv_header(fname, dict((k, v) for k, v in read_csv_params.items() if k in ['sep', 'encoding', 'quotechar']))
+        if columns_file is not None:
+            columns_pos = dict((c, i) for i, c in enumerate(columns_file))
+            convert_options.include_columns = sorted(usecols, key=lambda c: columns_pos.get(c, len(columns_pos)))
+    # keep dates and times as text like pandas. '%%' never matches so timestamps aren't inferred, dates and times found in the first block are read as strings
+    convert_options.timestamp_parsers = ['%%']
+    convert_options.column_types = dict(_read_csv_pyarrow_temporal(fname, read_options, parse_options, convert_options), **convert_options.column_types)
+
+    def postprocess(table):
+        if usecols is not None and not convert_options.include_columns:
+            columns = [table.column_names[c] if isinstance(c, int) else c for c in usecols]
+            table = table.select([c for c in table.column_names if c in columns]) # pandas keeps file order
+        if row_filter is not None:
+            expression, columns_filter, columns_missing = row_filter
+            columns = table.column_names
+            sources = [int(c[1:]) for c in columns] if header is None and names is None else columns
+            tablef = table.rename_columns([str(columns_filter.get(c, c)) for c in sources])
+            for c in columns_missing:
+                tablef = tablef.append_column(str(c), pa.nulls(tablef.num_rows)) # column missing in file
+            table = tablef.filter(expression).select(list(range(len(columns)))).rename_columns(columns)
+        df = _arrow_to_pandas(table)
+        if header is None and names is None:
+            df.columns = [int(c[1:]) for c in table.column_names] # positions in file like pandas
+        return df
+
+    chunksize, nrows = read_csv_params.get('chunksize'), read_csv_params.get('nrows')
+    if not chunksize and nrows is None:
+        yield postprocess(pacsv.read_csv(fname, read_options, parse_options, convert_options))
+        return
+
+    chunksize = int(chunksize) if chunksize else None
+    nrows_left = int(nrows) if nrows is not None else None
+    tables, tables_nrows, nrows_yielded = [], 0, 0
+
+    def coalesce(table):
+        # coalesce parser blocks into chunks of chunksize rows
+        nonlocal tables, tables_nrows, nrows_yielded
+        tables.append(table)
+        tables_nrows += table.num_rows
+        while chunksize and tables_nrows >= chunksize:
+            table = pa.concat_tables(tables)
+            yield postprocess(table.slice(0, chunksize))
+            tables, tables_nrows, nrows_yielded = [table.slice(chunksize)], tables_nrows - chunksize, nrows_yielded + chunksize
+
+    reader = pacsv.open_csv(fname, read_options, parse_options, convert_options)
+    schema = reader.schema
+    try:
+        for batch in reader:
+            if nrows_left is not None:
+                batch = batch.slice(0, nrows_left)
+                nrows_left -= batch.num_rows
+            yield from coalesce(pa.Table.from_batches([batch]))
+            if nrows_left == 0:
+                break
+    except pa.ArrowInvalid as e:
+        # column types are fixed from the first block, a later block doesn't fit them. infer types from full file and continue after rows already yielded
+        warnings.warn('{}: column types changed after first block, reading full file. Set dtype in read_csv_params to stream ({})'.format(fname, e))
+        try:
+            table = pacsv.read_csv(fname, read_options, parse_options, convert_options)
+        except pa.ArrowInvalid as e:
+            raise ValueError('{}: pyarrow failed to parse file, set dtype in read_csv_params or use read_engine="pandas" ({})'.format(fname, e)) from e
+        if nrows is not None:
+            table = table.slice(0, int(nrows))
+        schema, tables, tables_nrows = table.schema, [], 0
+        yield from coalesce(table.slice(nrows_yielded))
+    if tables_nrows or not nrows_yielded:
+        yield postprocess(pa.concat_tables(tables) if tables else schema.empty_table())
+
+def _read_csv_pyarrow_temporal(fname, read_options, parse_options, convert_options):
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    # columns pyarrow infers as dates or times from the first block
+    reader = pacsv.open_csv(fname, read_options, parse_options, convert_options)
+    return dict((field.name, pa.string()) for field in reader.schema if pa.types.is_temporal(field.type) and field.name not in convert_options.column_types)
+
+def _read_csv_pyarrow_dtype_all(fname, read_options, parse_options, dtype):
+    import pyarrow.csv as pacsv
+    # one dtype for all columns, need column names first
+    reader = pacsv.open_csv(fname, read_options, parse_options)
+    return {c: _pyarrow_type(dtype) for c in reader.schema.names}
+
+def _dtype_widen(dtypes):
+    # one dtype which can hold values of all dtypes
+    dtypes = set(dtypes)
+    if len(dtypes) == 1:
+        return dtypes.pop()
+    if all(pd.api.types.is_integer_dtype(d) or pd.api.types.is_float_dtype(d) for d in dtypes):
+        return np.dtype('float64')
+    return np.dtype('O')
+
+def _read_csv_dtypes_checked(dfs, fname):
+    # explain parser errors caused by inferred dtypes
+    try:
+        for dfc in dfs:
+            yield dfc
+    except (ValueError, TypeError) as e:
+        raise ValueError('Data in {} does not match inferred dtypes, use a larger dtypes_infer_nrows or None to scan full files: {}'.format(fname, e))
+
+class _IterError(object):
+    def __init__(self, e):
+        self.e = e
+
+_iter_done = object()
+
+def _iter_threaded(iterable, queue_size=2):
+    # runs iterable in a background thread. bounded queue keeps memory use at queue_size items
+    fqueue = queue.Queue(maxsize=queue_size)
+    is_stopped = threading.Event()
+
+    def put(item):
+        while not is_stopped.is_set():
+            try:
+                fqueue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+            put(_iter_done)
+        except BaseException as e:
+            put(_IterError(e))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = fqueue.get()
+            if item is _iter_done:
+                break
+            if isinstance(item, _IterError):
+                raise item.e
+            yield item
+    finally:
+        is_stopped.set() # consumer is done, let producer exit
+        thread.join()
+
+def _tables_coalesce(tables, nrows):
+    # re-chunk arrow tables into tables of nrows rows
+    import pyarrow as pa
+    buffer, buffer_nrows = [], 0
+    for table in tables:
+        buffer.append(table.replace_schema_metadata(None))
+        buffer_nrows += table.num_rows
+        while buffer_nrows >= nrows:
+            table = pa.concat_tables(buffer)
+            yield table.slice(0, nrows)
+            buffer, buffer_nrows = [table.slice(nrows)], buffer_nrows - nrows
+    if buffer_nrows:
+        yield pa.concat_tables(buffer)
+
+def _stats_collect(fun):
+    # records CombineStats of an output in self.stats, nested outputs add to the outer stats
+    @functools.wraps(fun)
+    def wrapper(self, *args, **kwargs):
+        if self._stats is not None:
+            return fun(self, *args, **kwargs)
+        self._stats = CombineStats(fun.__name__)
+        try:
+            result = fun(self, *args, **kwargs)
+        finally:
+            self.stats, self._stats = self._stats, None
+            self.stats.finish()
+        if self.logger:
+            self.logger.send_log(repr(self.stats), 'ok')
+        return result
+    return wrapper
+
+def _call_stats(combiner, fun, item):
+    # runs fun in a worker process and returns the stats of the file it processed
+    item, fname = item
+    return fun(item), combiner._stats.files.get(fname)
+
+# copies of a chunk in memory at the same time: parser buffers, aligned chunk and output conversion
+_memory_budget_copies = 4
+
+def _memory_str(value):
+    # memory used by a python string in an object column
+    return sys.getsizeof(value) + 8
+
+def _frames_coalesce(dfs, nrows):
+    # re-chunk dataframes into dataframes of nrows rows
+    buffer, buffer_nrows = [], 0
+    for dfc in dfs:
+        buffer.append(dfc)
+        buffer_nrows += len(dfc)
+        while buffer_nrows >= nrows:
+            dfc = buffer[0] if len(buffer) == 1 else pd.concat(buffer, sort=False, copy=False, ignore_index=True)
+            yield dfc.iloc[:nrows].reset_index(drop=True)
+            buffer, buffer_nrows = [dfc.iloc[nrows:]], buffer_nrows - nrows
+    if buffer_nrows:
+        dfc = buffer[0] if len(buffer) == 1 else pd.concat(buffer, sort=False, copy=False, ignore_index=True)
+        yield dfc.reset_index(drop=True)
+
+def _copy_raw(fname, fhandle):
+    # appends rows of a csv file to unbuffered binary fhandle without the header
+    with open(fname, 'rb') as fhandle_in:
+        line = fhandle_in.readline()
+        while line and not line.strip(): # pandas skips blank lines before header
+            line = fhandle_in.readline()
+        offset = fhandle_in.tell()
+        size = os.fstat(fhandle_in.fileno()).st_size
+        if offset >= size:
+            return
+        fhandle_in.seek(size-1)
+        is_newline = fhandle_in.read(1) == b'\n'
+        fhandle_in.seek(offset)
+
+        try:
+            while offset < size:
+                nbytes = os.sendfile(fhandle.fileno(), fhandle_in.fileno(), offset, size-offset)
+                if nbytes == 0:
+                    break
+                offset += nbytes
+        except (AttributeError, OSError):
+            # no sendfile on this platform or file system
+            fhandle_in.seek(offset)
+            shutil.copyfileobj(fhandle_in, fhandle, 16*1024*1024)
+        if not is_newline:
+            fhandle.write(b'\n')
+
+class _CSVStream(io.TextIOBase):
+    # file-like object which formats dataframes to csv as it gets read eg by COPY FROM STDIN. Holds one block of text in memory
+    # dfs: (fname, dataframe) items. on_block(fname, nrows, nbytes, seconds_convert, seconds_write) gets called once a block has been read, seconds_write is the time the reader took to ask for the next block
+    def __init__(self, dfs, write_params, nrows_block=10000, on_block=None):
+        self.dfs = iter(dfs)
+        self.write_params = write_params
+        self.nrows_block = nrows_block
+        self.on_block = on_block
+        self.blocks = iter(())
+        self.block, self.time_block = None, None
+        self.buffer, self.pos = '', 0
+
+    def _format_blocks(self, fname, dfc):
+        # format a slice of rows at a time instead of the whole chunk
+        for i in range(0, len(dfc), self.nrows_block):
+            time_start = time.perf_counter()
+            dfb = dfc.iloc[i:i+self.nrows_block]
+            text = dfb.to_csv(None, **self.write_params)
+            self.time_block = time.perf_counter()
+            self.block = (fname, len(dfb), len(text), self.time_block - time_start)
+            yield text
+
+    def _next_block(self):
+        if self.block is not None:
+            if self.on_block is not None:
+                self.on_block(*self.block, time.perf_counter() - self.time_block)
+            self.block = None
+        while True:
+            block = next(self.blocks, None)
+            if block is not None:
+                return block
+            item = next(self.dfs, None)
+            if item is None:
+                return None
+            self.blocks = self._format_blocks(*item)
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            return ''.join([self.buffer[self.pos:]] + list(iter(self._next_block, None)))
+        while self.pos >= len(self.buffer):
+            block = self._next_block()
+            if block is None:
+                return ''
+            self.buffer, self.pos = block, 0
+        text = self.buffer[self.pos:self.pos+size]
+        self.pos += len(text)
+        return text
+
 def _direxists(fname, logger):
     fdir = os.path.dirname(fname)
     if fdir and not os.path.exists(fdir):
@@ -50,13 +441,25 @@ class CombinerCSV(object, metaclass=d6tcollect.Collect):
         add_filename (bool): add filename column to output data frame. If `False`, will not add column.
         apply_after_read (function): function to apply after reading each file. needs to return a dataframe
         log (bool): send logs to logger
-        logger (object): logger object with `send_log()`
+        logger (object): logger object with `send_log()`, optionally with event hooks, see `d6tstack.utils.LoggerHooks`
+        sniff_workers (int): number of threads to sniff files in parallel. Helps when opening files is slow eg network drives
+        sniff_header_only (bool): sniff columns from the header line only without parsing rows with pandas. Preview rows are loaded when needed eg in `head()`
+        sniff_cache (str): path to sqlite file to cache sniff results in. Only new or changed files get sniffed again
+        read_engine (str): {'pandas', 'pyarrow'}, parser used to read data. 'pyarrow' uses the multithreaded `pyarrow.csv` parser and supports a subset of `read_csv_params`
+        filename_categorical (bool): add filename columns as categorical instead of strings. Saves memory and gets written as dictionary encoded columns to parquet
+        dtypes_infer (bool): infer one dtype per column from all files and pass it to the parser. Avoids casting every chunk in the `to_*` functions
+        dtypes_infer_nrows (int): number of rows to sample from each file to infer dtypes. If None, scans full files
+        row_filter (str or pyarrow expression): only keep rows which match, eg `"date >= '2011-02-01' and ticker in ['AAPL','MSFT']"`. Strings use `pandas.DataFrame.query()` syntax, pyarrow compute expressions need `read_engine='pyarrow'` and get evaluated on arrow types before converting to pandas. Dates are strings like with pandas, eg `pc.field('date') >= '2011-02-01'`. Uses column names after rename and gets applied right after parsing, before `apply_after_read`. Not applied to `combine_preview()`
+        memory_budget (int): approximate memory in bytes to use while processing. Sets rows per chunk for each file from the memory per row of its preview, overrides `chunksize`. Pipelined outputs hold an extra `queue_size` chunks
 
     """
 
     def __init__(self, fname_list, sep=',', nrows_preview=3, chunksize=1e6, read_csv_params=None,
                  columns_select=None, columns_select_common=False, columns_rename=None, add_filename=True,
-                 apply_after_read=None, log=True, logger=None):
+                 apply_after_read=None, log=True, logger=None, sniff_workers=None,
+                 sniff_header_only=False, sniff_cache=None, read_engine='pandas',
+                 filename_categorical=False, dtypes_infer=False, dtypes_infer_nrows=1000, memory_budget=None,
+                 row_filter=None):
         if not fname_list:
             raise ValueError("Filename list should not be empty")
         self.fname_list = np.sort(fname_list)
@@ -74,6 +477,12 @@ class CombinerCSV(object, metaclass=d6tcollect.Collect):
         if not log:
             self.logger = None
         self.sniff_results = None
+        self.sniff_workers = sniff_workers
+        self.sniff_header_only = sniff_header_only
+        self.sniff_cache = sniff_cache
+        if read_engine not in ['pandas', 'pyarrow']:
+            raise ValueError("Possible values of 'read_engine' are 'pandas' and 'pyarrow'")
+        self.read_engine = read_engine
         self.add_filename = add_filename
         self.columns_select = columns_select
         self.columns_select_common = columns_select_common
@@ -83,27 +492,137 @@ class CombinerCSV(object, metaclass=d6tcollect.Collect):
         self._columns_reindex = None
         self._columns_rename_dict = None
         self.apply_after_read = apply_after_read
+        self.dtypes_infer = dtypes_infer
+        self.dtypes_infer_nrows = dtypes_infer_nrows
+        self._dtypes = None
+        self.memory_budget = memory_budget
+        self._chunksizes = None
+        if row_filter is not None and not isinstance(row_filter, str):
+            if not type(row_filter).__module__.startswith('pyarrow'):
+                raise ValueError('row_filter needs to be a string or a pyarrow compute expression')
+            if read_engine != 'pyarrow':
+                raise ValueError('pyarrow expressions in row_filter need read_engine="pyarrow"')
+        self.row_filter = row_filter
+        self.filename_categorical = filename_categorical
+        if self.add_filename and self.filename_categorical:
+            # categories cover all files so chunks from different files concat without conversion
+            fnames_base = [ntpath.basename(fname) for fname in self.fname_list]
+            dtype_filepath = pd.CategoricalDtype(list(dict.fromkeys(self.fname_list)))
+            dtype_filename = pd.CategoricalDtype(list(dict.fromkeys(fnames_base)))
+            self._filename_dtypes = (dtype_filepath, dtype_filename)
+            self._filename_codes = dict(zip(self.fname_list, zip(dtype_filepath.categories.get_indexer(self.fname_list),
+                                                                 dtype_filename.categories.get_indexer(fnames_base))))
 
         self.df_combine_preview = None
+        self.stats = None
+        self._stats = None
+        self._hooks = logger_hooks(self.logger)
 
         if self.columns_select:
             if max(collections.Counter(columns_select).values())>1:
                 raise ValueError('Duplicate entries in columns_select')
 
-    def _read_csv_yield(self, fname, read_csv_params):
+    def _read_csv_engine(self, fname, read_csv_params, row_filter=None):
+        if self.read_engine == 'pyarrow':
+            return _read_csv_pyarrow(fname, read_csv_params, row_filter)
+        return pd.read_csv(fname, **read_csv_params)
+
+    def _row_filter_apply(self, dfc, fname):
+        # filter raw chunk before aligning, evaluated on a frame of filter columns with names after rename
+        plan = self._columns_plan[fname]
+        dff = pd.DataFrame(dict((target, dfc[source]) for target, source in plan['filter'] if source in dfc.columns), index=dfc.index)
+        for c in self._row_filter_columns:
+            if c not in dff.columns:
+                dff[c] = np.nan # column missing in file
+        mask = dff.eval(self.row_filter)
+        return dfc[np.asarray(mask, dtype=bool)]
+
+    def _read_csv_yield(self, fname, read_csv_params, is_filter=True):
         self._columns_reindex_available()
-        dfs = pd.read_csv(fname, **read_csv_params)
+        read_csv_params = self._read_csv_params_file(fname, read_csv_params)
+        stats, hooks = self._stats, self._hooks
+        row_filter = None
+        is_filter = is_filter and self.row_filter is not None
+        if is_filter and not isinstance(self.row_filter, str):
+            # push pyarrow expression into reader
+            columns_filter = self._columns_plan[fname]['filter']
+            columns_missing = [c for c in self._row_filter_columns if c not in [target for target, source in columns_filter]]
+            row_filter = (self.row_filter, dict((source, target) for target, source in columns_filter), columns_missing)
+            is_filter = False
+        is_timed = stats is not None or hooks.on_chunk is not None or hooks.on_file_end is not None
+        if hooks.on_file_start is not None:
+            hooks.on_file_start({'source': 'CombinerCSV', 'fname': fname})
+        time_start = time.perf_counter()
+        dfs = self._read_csv_engine(fname, read_csv_params, row_filter)
+        if self.dtypes_infer:
+            dfs = _read_csv_dtypes_checked(dfs, fname)
+        dfs = iter(dfs)
+        nrows, seconds = 0, 0.
+        if is_timed:
+            time_parse = time.perf_counter()
+            seconds += time_parse - time_start
+            if stats is not None:
+                stats.add(fname, 'open', time_parse - time_start)
         for dfc in dfs:
-            if self.columns_rename and self._columns_rename_dict[fname]:
-                dfc = dfc.rename(columns=self._columns_rename_dict[fname])
-
-            dfc = dfc.reindex(columns=self._columns_reindex)
+            if is_timed:
+                time_align = time.perf_counter()
+                if stats is not None:
+                    stats.add(fname, 'parse', time_align - time_parse)
+            if is_filter:
+                dfc = self._row_filter_apply(dfc, fname)
+                if stats is not None:
+                    time_filter, time_align = time_align, time.perf_counter()
+                    stats.add(fname, 'filter', time_align - time_filter)
+            dfc = self._columns_align(dfc, fname)
             if self.apply_after_read:
+                if stats is not None:
+                    time_apply = time.perf_counter()
+                    stats.add(fname, 'align', time_apply - time_align)
                 dfc = self.apply_after_read(dfc)
+                if stats is not None:
+                    time_align = time.perf_counter()
+                    stats.add(fname, 'apply', time_align - time_apply)
             if self.add_filename:
-                dfc['filepath'] = fname
-                dfc['filename'] = ntpath.basename(fname)
+                if self.filename_categorical:
+                    dtype_filepath, dtype_filename = self._filename_dtypes
+                    codes_filepath, codes_filename = self._filename_codes[fname]
+                    dfc['filepath'] = pd.Categorical.from_codes(np.full(len(dfc), codes_filepath), dtype=dtype_filepath)
+                    dfc['filename'] = pd.Categorical.from_codes(np.full(len(dfc), codes_filename), dtype=dtype_filename)
+                else:
+                    dfc['filepath'] = fname
+                    dfc['filename'] = ntpath.basename(fname)
+            if is_timed:
+                time_end = time.perf_counter()
+                if stats is not None:
+                    stats.add(fname, 'align', time_end - time_align, rows=len(dfc))
+                seconds += time_end - time_parse
+                nrows += len(dfc)
+                if hooks.on_chunk is not None:
+                    hooks.on_chunk({'source': 'CombinerCSV', 'fname': fname, 'rows': len(dfc), 'seconds': time_end - time_parse})
             yield dfc
+            if is_timed:
+                time_parse = time.perf_counter() # time spent by consumer doesn't count as parsing
+        if hooks.on_file_end is not None:
+            hooks.on_file_end({'source': 'CombinerCSV', 'fname': fname, 'rows': nrows, 'seconds': seconds, 'bytes': os.path.getsize(fname)})
+
+    def _read_csv_all(self, fname):
+        return [dfc for dfc in self._read_csv_yield(fname, self.read_csv_params)]
+
+    def _read_csv_yield_all(self, fname_list):
+        # chunks from all files with the file they came from
+        for fname in fname_list:
+            for dfc in self._read_csv_yield(fname, self.read_csv_params):
+                yield fname, dfc
+
+    def _map_workers_stats(self, fun, fname_list, items, n_workers):
+        # same as _map_workers, collects stats from worker processes
+        if not n_workers or n_workers == 1:
+            return [fun(item) for item in items]
+        results = _map_workers(functools.partial(_call_stats, self, fun), list(zip(items, fname_list)), n_workers)
+        for fname, (_, stats_file) in zip(fname_list, results):
+            if stats_file is not None:
+                self._stats.files[fname] = stats_file
+        return [result for result, _ in results]
 
     def sniff_columns(self):
 
@@ -125,20 +644,37 @@ class CombinerCSV(object, metaclass=d6tcollect.Collect):
         if self.logger:
             self.logger.send_log('sniffing columns', 'ok')
 
-        read_csv_params = copy.deepcopy(self.read_csv_params)
-        read_csv_params['dtype'] = str
-        read_csv_params['nrows'] = self.nrows_preview
-        read_csv_params['chunksize'] = None
+        read_csv_params = self._read_csv_params_preview()
 
         # read nrows of every file
-        self.dfl_all = []
-        for fname in self.fname_list:
-            # todo: make sure no nrows param in self.read_csv_params
+        # todo: make sure no nrows param in self.read_csv_params
+        def read_preview(fname):
+            if self.sniff_header_only:
+                columns = _read_csv_header(fname, self.read_csv_params)
+                if columns is not None:
+                    return columns, None # preview rows get loaded on demand
             df = pd.read_csv(fname, **read_csv_params)
-            self.dfl_all.append(df)
+            return df.columns.tolist(), df
+
+        # only read files which are not in cache or have changed
+        cache = self._sniff_cache()
+        dfl_sniff = cache.get(self.fname_list) if cache else {}
+        fname_list = [fname for fname in self.fname_list if fname not in dfl_sniff]
+
+        if self.sniff_workers and self.sniff_workers > 1:
+            # bounded number of concurrent file opens, results stay in fname_list order
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.sniff_workers) as executor:
+                dfl_read = dict(zip(fname_list, executor.map(read_preview, fname_list)))
+        else:
+            dfl_read = {fname: read_preview(fname) for fname in fname_list}
+        if cache and dfl_read:
+            cache.put(dfl_read)
+        dfl_sniff.update(dfl_read)
+        dfl_sniff = [dfl_sniff[fname] for fname in self.fname_list]
+        self.dfl_all = [df for _, df in dfl_sniff]
 
         # process columns
-        dfl_all_col = [df.columns.tolist() for df in self.dfl_all]
+        dfl_all_col = [columns for columns, _ in dfl_sniff]
         col_files = dict(zip(self.fname_list, dfl_all_col))
         col_common = list_common(list(col_files.values()))
         col_all = list_unique(list(col_files.values()))
@@ -178,6 +714,30 @@ class CombinerCSV(object, metaclass=d6tcollect.Collect):
 
         return sniff_results
 
+    def _read_csv_params_preview(self):
+        read_csv_params = copy.deepcopy(self.read_csv_params)
+        read_csv_params['dtype'] = str
+        read_csv_params['nrows'] = self.nrows_preview
+        read_csv_params['chunksize'] = None
+        return read_csv_params
+
+    def _sniff_cache(self):
+        if not self.sniff_cache:
+            return None
+        return SniffCache(self.sniff_cache, {'read_csv_params': self._read_csv_params_preview(),
+                                             'sniff_header_only': self.sniff_header_only})
+
+    def _dfl_all_available(self):
+        self._sniff_available()
+        if any(df is None for df in self.dfl_all):
+            read_csv_params = self._read_csv_params_preview()
+            dfl_read = {fname: pd.read_csv(fname, **read_csv_params)
+                        for fname, df in zip(self.fname_list, self.dfl_all) if df is None}
+            cache = self._sniff_cache()
+            if cache:
+                cache.put({fname: (df.columns.tolist(), df) for fname, df in dfl_read.items()})
+            self.dfl_all = [dfl_read.get(fname, df) for fname, df in zip(self.fname_list, self.dfl_all)]
+
     def get_sniff_results(self):
         if not self.sniff_results:
             self.sniff_columns()
@@ -262,7 +822,7 @@ class CombinerCSV(object, metaclass=d6tcollect.Collect):
         Returns:
              dict: filename, dataframe
         """
-        self._sniff_available()
+        self._dfl_all_available()
         return dict(zip(self.fname_list,self.dfl_all))
 
     def _columns_reindex_prep(self):
@@ -303,9 +863,158 @@ class CombinerCSV(object, metaclass=d6tcollect.Collect):
             columns_select2 = list(dict.fromkeys([columns_rename[k] if k in columns_rename.keys() else k for k in columns_select2]))  # set of columns after rename
         # store select by file
         self._columns_reindex = columns_select2
+        self._columns_plan_prep()
+
+    def _columns_plan_prep(self):
+        # compile rename+reindex into positions for each file so chunks get aligned without label lookups
+        self._columns_plan = {}
+        # pandas raises if parse_dates names a column which isn't parsed, dtype and converters ignore them
+        is_usecols = not any(k in self.read_csv_params for k in ['usecols', 'names', 'index_col', 'parse_dates'])
+        columns_files = {}
+        for fname in self.fname_list:
+            columns_file = self.sniff_results['files_columns'][fname]
+            if self.columns_rename:
+                columns_file = [self._columns_rename_dict[fname].get(c, c) for c in columns_file]
+            columns_files[fname] = columns_file
+
+        # columns used by row_filter. names found anywhere in the filter count, reading an extra column is harmless
+        self._row_filter_columns = []
+        if self.row_filter is not None:
+            row_filter = str(self.row_filter)
+            columns_all = list(dict.fromkeys(itertools.chain.from_iterable(columns_files.values())))
+            self._row_filter_columns = [c for c in columns_all if str(c) in row_filter]
+
+        for fname in self.fname_list:
+            columns_source = self.sniff_results['files_columns'][fname]
+            columns_file = columns_files[fname]
+            columns_pos = dict((c, i) for i, c in enumerate(columns_file))
+            columns = [c for c in self._columns_reindex if c in columns_pos]
+            take = [columns_pos[c] for c in columns]
+            columns_filter = [c for c in self._row_filter_columns if c in columns_pos]
+            columns_filter_source = [columns_source[columns_pos[c]] for c in columns_filter]
+            usecols_keep = sorted(set(take) | set(columns_pos[c] for c in columns_filter))
+            columns_source = [columns_source[i] for i in take]
+            ncols, usecols, columns_read = len(columns_file), None, self.sniff_results['files_columns'][fname]
+            if is_usecols and take and len(usecols_keep) < ncols:
+                # only parse columns which are kept or filtered on
+                usecols = usecols_keep
+                take = [usecols.index(i) for i in take]
+                ncols = len(usecols)
+                columns_read = [columns_read[i] for i in usecols]
+            self._columns_plan[fname] = {
+                'ncols': ncols,
+                'columns_read': pd.Index(columns_read), # labels of parsed chunk, positions only apply if they match
+                'usecols': usecols,
+                'take': None if take == list(range(ncols)) else take, # None: nothing to do
+                'columns': columns,
+                'columns_source': columns_source,
+                'is_complete': len(columns) == len(self._columns_reindex), # False: missing columns need to be added
+                'filter': list(zip(columns_filter, columns_filter_source)), # row_filter columns, name after rename and in file
+            }
+
+    def _read_csv_params_file(self, fname, read_csv_params, is_dtypes=True):
+        # read_csv params for a file with column selection pushed into the reader
+        self._columns_reindex_available()
+        plan = self._columns_plan[fname]
+        usecols = plan['usecols']
+        is_dtypes = is_dtypes and self.dtypes_infer and not (read_csv_params.get('dtype') is not None and not isinstance(read_csv_params['dtype'], dict))
+        is_chunksize = self.memory_budget and read_csv_params.get('chunksize')
+        if usecols is None and not is_dtypes and not is_chunksize:
+            return read_csv_params
+        read_csv_params = read_csv_params.copy()
+        if is_chunksize:
+            self._chunksizes_available()
+            read_csv_params['chunksize'] = self._chunksizes[fname]
+        if usecols is not None:
+            if self.read_engine == 'pyarrow' and read_csv_params.get('header', 'infer') is not None:
+                usecols = [self.sniff_results['files_columns'][fname][i] for i in usecols] # names skip converting other columns
+            read_csv_params['usecols'] = usecols
+        if is_dtypes:
+            # parse straight into target dtypes, dtypes passed by user take precedence
+            self._dtypes_available()
+            dtype = dict((c_source, self._dtypes[c]) for c_source, c in zip(plan['columns_source'], plan['columns']) if c in self._dtypes)
+            dtype.update(read_csv_params.get('dtype') or {})
+            read_csv_params['dtype'] = dtype
+        return read_csv_params
+
+    def _chunksizes_prep(self):
+        # rows per chunk for each file so that processing a chunk stays within memory_budget
+        self._dfl_all_available()
+        chunksizes = {}
+        for fname, dfp in zip(self.fname_list, self.dfl_all):
+            plan = self._columns_plan[fname]
+            nbytes = 0
+            for c in plan['columns_source']:
+                # parsed numbers take 8 bytes, strings are estimated from the preview
+                col = dfp[c]
+                if pd.to_numeric(col, errors='coerce').notnull().sum() == col.notnull().sum() or not len(col):
+                    nbytes += 8
+                else:
+                    nbytes += max(col.memory_usage(index=False, deep=True) / len(col), 8)
+            nbytes += 8 * (len(self._columns_reindex) - len(plan['columns'])) # missing columns filled with NaN
+            if self.add_filename:
+                nbytes += 2 if self.filename_categorical else _memory_str(fname) + _memory_str(ntpath.basename(fname))
+            chunksizes[fname] = max(int(self.memory_budget / _memory_budget_copies / nbytes), 1)
+        self._chunksizes = chunksizes
+
+    def _chunksizes_available(self):
+        if self._chunksizes is None:
+            self._chunksizes_prep()
+
+    def _dtypes_prep(self):
+        # infer dtypes by sampling every file and widen to one dtype per column
+        if self.logger:
+            self.logger.send_log('inferring dtypes', 'ok')
+        read_csv_params = copy.deepcopy(self.read_csv_params)
+        if self.dtypes_infer_nrows:
+            read_csv_params['nrows'] = self.dtypes_infer_nrows
+        dtypes, columns_missing = collections.defaultdict(set), set()
+        for fname in self.fname_list:
+            plan = self._columns_plan[fname]
+            for dfc in self._read_csv_engine(fname, self._read_csv_params_file(fname, read_csv_params, is_dtypes=False)):
+                dfc = self._columns_align(dfc, fname)
+                is_notnull = dfc.notnull().any()
+                for c, dtype in dfc.dtypes.items():
+                    if is_notnull[c]: # all null columns don't tell anything
+                        dtypes[c].add(dtype)
+            columns_missing.update(c for c in self._columns_reindex if c not in plan['columns'])
+
+        # missing columns get filled with NaN. columns which are null everywhere are left to the parser
+        self._dtypes = dict((c, _dtype_widen(dtypes[c] | ({np.dtype('float64')} if c in columns_missing else set())))
+                            for c in self._columns_reindex if c in dtypes)
+
+    def _dtypes_available(self):
+        if self._dtypes is None:
+            self._dtypes_prep()
+
+    def preview_dtypes(self):
+        """
+        Shows dtypes inferred across all files which are used to parse data, see `dtypes_infer`
+
+        Returns:
+            dict: column, dtype
+        """
+        self._columns_reindex_available()
+        self._dtypes_available()
+        return self._dtypes
+
+    def _columns_align(self, dfc, fname):
+        plan = self._columns_plan[fname]
+        if len(dfc.columns) != plan['ncols'] or not dfc.columns.equals(plan['columns_read']):
+            # data doesn't look like sniffed file, use labels
+            if self.columns_rename and self._columns_rename_dict[fname]:
+                dfc = dfc.rename(columns=self._columns_rename_dict[fname])
+            return dfc.reindex(columns=self._columns_reindex)
+
+        if plan['take'] is not None:
+            dfc = dfc.iloc[:, plan['take']]
+        dfc.columns = plan['columns']
+        if not plan['is_complete']:
+            dfc = dfc.reindex(columns=self._columns_reindex)
+        return dfc
 
     def _columns_reindex_available(self):
-        if not self._columns_rename_dict or not self._columns_reindex:
+        if self._columns_reindex is None:
             self._columns_reindex_prep()
 
     def preview_rename(self):
@@ -339,7 +1048,12 @@ class CombinerCSV(object, metaclass=d6tcollect.Collect):
         read_csv_params = copy.deepcopy(self.read_csv_params)
         read_csv_params['nrows'] = self.nrows_preview
 
-        df = [[dfc for dfc in self._read_csv_yield(fname, read_csv_params)] for fname in self.fname_list]
+        # preview rows don't count towards output stats and hooks
+        stats, hooks, self._stats, self._hooks = self._stats, self._hooks, None, logger_hooks(None)
+        try:
+            df = [[dfc for dfc in self._read_csv_yield(fname, read_csv_params, is_filter=False)] for fname in self.fname_list]
+        finally:
+            self._stats, self._hooks = stats, hooks
         df = _dfconact(df)
         self.df_combine_preview = df.copy()
         return df
@@ -348,17 +1062,90 @@ class CombinerCSV(object, metaclass=d6tcollect.Collect):
         if self.df_combine_preview is None:
             self.combine_preview()
 
-    def to_pandas(self):
+    def _astype_preview(self, dfc):
+        # cast to preview dtypes, skip copying data if dtypes already match
+        if dfc.dtypes.equals(self.df_combine_preview.dtypes):
+            return dfc
+        return dfc.astype(self.df_combine_preview.dtypes)
+
+    @_stats_collect
+    def to_pandas(self, n_workers=None):
         """
         Combine all files to a pandas dataframe
 
+        Args:
+            n_workers (int): number of worker processes to read files in parallel. If None, reads files one at a time. `apply_after_read` and `logger` need to be picklable
+
         Returns:
             dataframe: combined data
         """
-        df = [[dfc for dfc in self._read_csv_yield(fname, self.read_csv_params)] for fname in self.fname_list]
+        self._columns_reindex_available() # prep once so workers don't redo it
+        df = self._map_workers_stats(self._read_csv_all, self.fname_list, self.fname_list, n_workers)
         df = _dfconact(df)
         return df
 
+    def iter_chunks(self, batch_rows=None, batch_bytes=None):
+        """
+        Iterate over combined data in batches so memory stays flat. Batches have the columns and dtypes of `combine_preview()`
+
+        Args:
+            batch_rows (int): target rows per batch. Smaller chunks get combined and larger chunks get split. If None and batch_bytes is None, yields chunks as they are read, see `chunksize`
+            batch_bytes (int): target memory size per batch in bytes, converted to rows using the memory usage of `combine_preview()`
+
+        Yields:
+            dataframe: batch of combined data
+        """
+        self._combine_preview_available()
+        if batch_rows is None and batch_bytes is not None:
+            dfhead = self.df_combine_preview
+            row_bytes = dfhead.memory_usage(index=False, deep=True).sum() / max(len(dfhead), 1)
+            batch_rows = batch_bytes / max(row_bytes, 1)
+        dfs = (self._astype_preview(dfc) for fname in self.fname_list for dfc in self._read_csv_yield(fname, self.read_csv_params))
+        if batch_rows is not None:
+            dfs = _frames_coalesce(dfs, max(int(batch_rows), 1))
+        for dfc in dfs:
+            yield dfc
+
+    def iter_batches(self, batch_rows=None, batch_bytes=None):
+        """
+        Iterate over combined data as arrow record batches with a consistent schema. See `iter_chunks()`
+
+        Args:
+            batch_rows (int): target rows per batch
+            batch_bytes (int): target memory size per batch in bytes
+
+        Yields:
+            pyarrow.RecordBatch: batch of combined data
+        """
+        import pyarrow as pa
+
+        self._combine_preview_available()
+        schema = pa.Schema.from_pandas(self.df_combine_preview, preserve_index=False)
+        for dfc in self.iter_chunks(batch_rows=batch_rows, batch_bytes=batch_bytes):
+            yield pa.RecordBatch.from_pandas(dfc, schema=schema, preserve_index=False)
+
+    def _read_csv_partition(self, fname):
+        # one file as a single dataframe cast to preview dtypes so it matches dask meta
+        dfs = self._read_csv_all(fname)
+        if not dfs:
+            return self.df_combine_preview[:0].copy()
+        return self._astype_preview(_dfconact([dfs]))
+
+    def to_dask(self):
+        """
+        Combine all files to a lazy dask dataframe with one partition per file. Columns are aligned the same way as `to_pandas()` and metadata is taken from `combine_preview()` so building the graph doesn't read any data
+
+        Returns:
+            dask dataframe: combined data
+        """
+        import dask
+        import dask.dataframe as dd
+
+        self._combine_preview_available()
+        self._columns_reindex_available() # prep once so tasks don't redo it
+        parts = [dask.delayed(self._read_csv_partition)(fname) for fname in self.fname_list]
+        return dd.from_delayed(parts, meta=self.df_combine_preview[:0])
+
     def _get_filepath_out(self, fname, output_dir, output_prefix, ext):
         # filename
         fname_out = ntpath.basename(fname)
@@ -371,6 +1158,28 @@ class CombinerCSV(object, metaclass=d6tcollect.Collect):
         assert _direxists(fpath_out, self.logger)
         return fpath_out
 
+    def _manifest_prep(self, manifest, if_changed):
+        # files to process in incremental mode
+        if if_changed not in ['warn', 'raise', 'append']:
+            raise ValueError("Possible values of 'if_changed' are 'warn', 'raise' and 'append'")
+        self._combine_preview_available()
+        manifest = IngestManifest(manifest)
+        if manifest.columns is not None and manifest.columns != self.df_combine_preview.columns.tolist():
+            raise ValueError('Columns changed since last run from {} to {}, use columns_select to keep columns consistent'.format(manifest.columns, self.df_combine_preview.columns.tolist()))
+        fname_list, fname_changed = manifest.diff(self.fname_list)
+        if fname_changed:
+            msg = 'Files changed since they were processed: {}'.format(fname_changed)
+            if if_changed == 'raise':
+                raise ValueError(msg)
+            elif if_changed == 'warn':
+                warnings.warn(msg+'. Skipping, use if_changed="append" to process them again')
+            else:
+                fname_list = fname_list + fname_changed
+                fname_list = [fname for fname in self.fname_list if fname in fname_list]
+        if self.logger:
+            self.logger.send_log('incremental: {} of {} files to process'.format(len(fname_list), len(self.fname_list)), 'ok')
+        return manifest, fname_list
+
     def _to_csv_prep(self, write_params):
         if 'index' not in write_params:
             write_params['index'] = False
@@ -393,6 +1202,7 @@ class CombinerCSV(object, metaclass=d6tcollect.Collect):
         """
 
         write_params = self._to_csv_prep(write_params)
+        self._dfl_all_available()
 
         fnamesout = []
         for fname, dfg in dict(zip(self.fname_list,self.dfl_all)).items():
@@ -403,7 +1213,45 @@ class CombinerCSV(object, metaclass=d6tcollect.Collect):
 
         return fnamesout
 
-    def to_csv_align(self, output_dir=None, output_prefix='d6tstack-', write_params={}):
+    def _to_csv_align_file(self, fnames, write_params):
+        fname, filename = fnames
+        if self.logger:
+            self.logger.send_log('writing '+filename , 'ok')
+        fhandle = open(filename, 'w')
+        self.df_combine_preview[:0].to_csv(fhandle, **write_params)
+        for dfc in self._read_csv_yield(fname, self.read_csv_params):
+            self._to_csv_write(fhandle, fname, dfc, write_params)
+        fhandle.close()
+        return filename
+
+    def _stats_write(self, fname, seconds, rows=0, bytes_out=0):
+        # records data written to the output
+        self._stats.add(fname, 'write', seconds, bytes_out=bytes_out)
+        if self._hooks.on_output_flush is not None:
+            self._hooks.on_output_flush({'source': 'CombinerCSV', 'output': self._stats.output, 'fname': fname, 'rows': rows, 'bytes': bytes_out, 'seconds': seconds})
+
+    def _stats_block(self, fname, nrows, nbytes, seconds_convert, seconds_write):
+        # records a block of csv text streamed to the output
+        self._stats.add(fname, 'convert', seconds_convert)
+        self._stats_write(fname, seconds_write, rows=nrows, bytes_out=nbytes)
+
+    def _stats_write_load(self, seconds):
+        # records one load of all files, time is split by rows of each file. bytes_out were counted when writing the load file
+        rows = self._stats.rows
+        for fname in self.fname_list:
+            rows_file = self._stats.file(fname)['rows']
+            self._stats_write(fname, seconds * rows_file / max(rows, 1), rows=rows_file)
+
+    def _to_csv_write(self, fhandle, fname, dfc, write_params):
+        time_start = time.perf_counter()
+        csv_text = dfc.to_csv(None, header=False, **write_params)
+        time_write = time.perf_counter()
+        fhandle.write(csv_text)
+        self._stats.add(fname, 'convert', time_write - time_start)
+        self._stats_write(fname, time.perf_counter() - time_write, rows=len(dfc), bytes_out=len(csv_text))
+
+    @_stats_collect
+    def to_csv_align(self, output_dir=None, output_prefix='d6tstack-', write_params={}, n_workers=None):
         """
         Create cleaned versions of original files. Automatically runs out of core, using `self.chunksize`.
 
@@ -411,6 +1259,7 @@ class CombinerCSV(object, metaclass=d6tcollect.Collect):
             output_dir (str): directory to save files in. If not given save in the same directory as the original file
             output_prefix (str): prepend with prefix to distinguish from original files
             write_params (dict): additional params to pass to `pandas.to_csv()`
+            n_workers (int): number of worker processes to process files in parallel. Each worker holds one chunk in memory at a time. If None, processes files one at a time
 
         Returns:
             list: list of filenames of processed files
@@ -418,28 +1267,43 @@ class CombinerCSV(object, metaclass=d6tcollect.Collect):
         # stream all chunks to multiple files
 
         write_params = self._to_csv_prep(write_params)
+        self._columns_reindex_available()
 
-        fnamesout = []
-        for fname in self.fname_list:
-            filename = self._get_filepath_out(fname, output_dir, output_prefix, '.csv')
-            if self.logger:
-                self.logger.send_log('writing '+filename , 'ok')
-            fhandle = open(filename, 'w')
-            self.df_combine_preview[:0].to_csv(fhandle, **write_params)
-            for dfc in self._read_csv_yield(fname, self.read_csv_params):
-                dfc.to_csv(fhandle, header=False, **write_params)
-            fhandle.close()
-            fnamesout.append(filename)
-
-        return fnamesout
+        fnamesout = [self._get_filepath_out(fname, output_dir, output_prefix, '.csv') for fname in self.fname_list]
+        return self._map_workers_stats(functools.partial(self._to_csv_align_file, write_params=write_params),
+                                       self.fname_list, list(zip(self.fname_list, fnamesout)), n_workers)
 
-    def to_csv_combine(self, filename, write_params={}):
+    def _is_copy_raw(self, write_params):
+        # can rows be copied from input files without parsing?
+        self._columns_reindex_available()
+        if self.read_engine != 'pandas' or not set(self.read_csv_params.keys()).issubset(['sep', 'chunksize']):
+            return False
+        if not set(write_params.keys()).issubset(['index', 'sep']) or write_params.get('sep', ',') != self.read_csv_params['sep']:
+            return False
+        if self.add_filename or self.apply_after_read or self.row_filter is not None or not self.is_all_equal():
+            return False
+        if any(not isinstance(fname, (str, pathlib.PurePath)) or _is_compressed(fname) for fname in self.fname_list):
+            return False # raw bytes would not be csv text
+        if any(any(not isinstance(c, str) or '\n' in c or '\r' in c for c in columns) for columns in self.sniff_results['files_columns'].values()):
+            return False # header not on one line
+        return all(plan['usecols'] is None and plan['take'] is None and plan['is_complete'] and
+                   plan['columns'] == self.sniff_results['files_columns'][fname] # no rename
+                   for fname, plan in self._columns_plan.items())
+
+    @_stats_collect
+    def to_csv_combine(self, filename, write_params={}, manifest=None, if_changed='warn', pipeline=False, queue_size=2,
+                       copy_raw=False):
         """
         Combines all files to a single csv file. Automatically runs out of core, using `self.chunksize`.
 
         Args:
             filename (str): file names
             write_params (dict): additional params to pass to `pandas.to_csv()`
+            manifest (str): path to manifest file for incremental mode. Only files not in the manifest get appended to the output
+            if_changed (str): {'warn', 'raise', 'append'}, what to do in incremental mode with files which changed since they were processed. 'append' processes them again, already loaded rows are not removed
+            pipeline (bool): parse and format csv in separate threads so reading, parsing and writing overlap. Reading continues into the next file while writing
+            queue_size (int): number of chunks buffered between pipeline stages. Memory use is about `queue_size` x `chunksize` per stage
+            copy_raw (bool): if all files have the same columns and no rename, select, `apply_after_read` or `add_filename` is used, copy rows from the input files without parsing them. Data is written exactly as in the input files. Rows are not parsed so they are not counted in `self.stats`
 
         Returns:
             str: filename for combined data
@@ -447,16 +1311,70 @@ class CombinerCSV(object, metaclass=d6tcollect.Collect):
         # stream all chunks from all files to a single file
         write_params = self._to_csv_prep(write_params)
 
+        fname_list, is_append = self.fname_list, False
+        if manifest:
+            manifest, fname_list = self._manifest_prep(manifest, if_changed)
+            is_append = bool(manifest.files) and os.path.exists(filename)
+
         assert _direxists(filename, self.logger)
-        fhandle = open(filename, 'w')
-        self.df_combine_preview[:0].to_csv(fhandle, **write_params)
-        for fname in self.fname_list:
-            for dfc in self._read_csv_yield(fname, self.read_csv_params):
-                dfc.to_csv(fhandle, header=False, **write_params)
-        fhandle.close()
+        fhandle = open(filename, 'a' if is_append else 'w')
+        if not is_append:
+            self.df_combine_preview[:0].to_csv(fhandle, **write_params)
+        if copy_raw and not self._is_copy_raw(write_params):
+            warnings.warn('copy_raw needs files with the same columns and no processing, parsing files instead')
+            copy_raw = False
+        if copy_raw:
+            fhandle.close()
+            with open(filename, 'r+b', buffering=0) as fhandle: # sendfile fails on files opened for append
+                fhandle.seek(0, os.SEEK_END)
+                for fname in fname_list:
+                    time_start, offset = time.perf_counter(), fhandle.tell()
+                    _copy_raw(fname, fhandle)
+                    self._stats_write(fname, time.perf_counter() - time_start, bytes_out=fhandle.tell() - offset)
+        elif pipeline:
+            def to_csv_text(item):
+                fname, dfc = item
+                time_start = time.perf_counter()
+                csv_text = dfc.to_csv(None, header=False, **write_params)
+                self._stats.add(fname, 'convert', time.perf_counter() - time_start)
+                return fname, len(dfc), csv_text
+            dfs = self._read_csv_yield_all(fname_list)
+            try:
+                for fname, nrows, csv_text in _iter_threaded(map(to_csv_text, _iter_threaded(dfs, queue_size)), queue_size):
+                    time_start = time.perf_counter()
+                    fhandle.write(csv_text)
+                    self._stats_write(fname, time.perf_counter() - time_start, rows=nrows, bytes_out=len(csv_text))
+            finally:
+                fhandle.close()
+        else:
+            for fname, dfc in self._read_csv_yield_all(fname_list):
+                self._to_csv_write(fhandle, fname, dfc, write_params)
+            fhandle.close()
+        if manifest:
+            manifest.update(fname_list, self.df_combine_preview.columns)
         return filename
 
-    def to_parquet_align(self, output_dir=None, output_prefix='d6tstack-', write_params={}):
+    def _to_parquet_align_file(self, fnames, write_params):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        fname, filename = fnames
+        if self.logger:
+            self.logger.send_log('writing '+filename , 'ok')
+        pqschema = pa.Table.from_pandas(self.df_combine_preview).schema
+        pqwriter = pq.ParquetWriter(filename, pqschema)
+        for dfc in self._read_csv_yield(fname, self.read_csv_params):
+            time_start = time.perf_counter()
+            table = pa.Table.from_pandas(self._astype_preview(dfc), schema=pqschema)
+            time_write = time.perf_counter()
+            pqwriter.write_table(table, **write_params)
+            self._stats.add(fname, 'convert', time_write - time_start)
+            self._stats_write(fname, time.perf_counter() - time_write, rows=table.num_rows, bytes_out=table.nbytes)
+        pqwriter.close()
+        return filename
+
+    @_stats_collect
+    def to_parquet_align(self, output_dir=None, output_prefix='d6tstack-', write_params={}, n_workers=None):
         """
         Same as `to_csv_align` but outputs parquet files
 
@@ -465,45 +1383,84 @@ class CombinerCSV(object, metaclass=d6tcollect.Collect):
 
         # stream all chunks to multiple files
         self._combine_preview_available()
+        self._columns_reindex_available()
 
-        import pyarrow as pa
-        import pyarrow.parquet as pq
-
-        fnamesout = []
-        pqschema = pa.Table.from_pandas(self.df_combine_preview).schema
-        for fname in self.fname_list:
-            filename = self._get_filepath_out(fname, output_dir, output_prefix, '.pq')
-            if self.logger:
-                self.logger.send_log('writing '+filename , 'ok')
-            pqwriter = pq.ParquetWriter(filename, pqschema)
-            for dfc in self._read_csv_yield(fname, self.read_csv_params):
-                pqwriter.write_table(pa.Table.from_pandas(dfc.astype(self.df_combine_preview.dtypes), schema=pqschema),**write_params)
-            pqwriter.close()
-            fnamesout.append(filename)
-
-        return fnamesout
+        fnamesout = [self._get_filepath_out(fname, output_dir, output_prefix, '.pq') for fname in self.fname_list]
+        return self._map_workers_stats(functools.partial(self._to_parquet_align_file, write_params=write_params),
+                                       self.fname_list, list(zip(self.fname_list, fnamesout)), n_workers)
 
-    def to_parquet_combine(self, filename, write_params={}):
+    @_stats_collect
+    def to_parquet_combine(self, filename, write_params={}, manifest=None, if_changed='warn', pipeline=False,
+                           queue_size=2, row_group_size=None, compression='snappy', use_dictionary=True):
         """
-        Same as `to_csv_combine` but outputs parquet files
+        Same as `to_csv_combine` but outputs parquet files. In incremental mode `filename` is a directory and every run adds a new parquet file with the new input files
+
+        Args:
+            pipeline (bool): read, convert and write in separate threads so parsing and parquet encoding overlap
+            queue_size (int): number of chunks buffered between pipeline stages. Memory use is about `queue_size` x `chunksize` per stage
+            row_group_size (int): number of rows per parquet row group. If None, writes one row group per chunk
+            compression (str): parquet compression codec, see `pyarrow.parquet.ParquetWriter`
+            use_dictionary (bool or list): dictionary encode all or listed columns, see `pyarrow.parquet.ParquetWriter`
 
         """
         # stream all chunks from all files to a single file
         self._combine_preview_available()
 
+        fname_list = self.fname_list
+        if manifest:
+            manifest, fname_list = self._manifest_prep(manifest, if_changed)
+            if not fname_list:
+                return filename
+            fdir = filename
+            filename = os.path.join(fdir, 'part-{:05d}.pq'.format(len(glob.glob(os.path.join(fdir, 'part-*.pq')))))
+
         assert _direxists(filename, self.logger)
         import pyarrow as pa
         import pyarrow.parquet as pq
 
         # todo: fix mixed data type writing. at least give a warning
-        pqwriter = pq.ParquetWriter(filename, pa.Table.from_pandas(self.df_combine_preview).schema)
-        for fname in self.fname_list:
-            for dfc in self._read_csv_yield(fname, self.read_csv_params):
-                pqwriter.write_table(pa.Table.from_pandas(dfc.astype(self.df_combine_preview.dtypes)),**write_params)
-        pqwriter.close()
+        pqschema = pa.Table.from_pandas(self.df_combine_preview).schema
+
+        fname_table = [None] # file of the last converted table, coalesced row groups are counted towards it
+
+        def convert(item):
+            fname, dfc = item
+            time_start = time.perf_counter()
+            table = pa.Table.from_pandas(self._astype_preview(dfc), schema=pqschema)
+            self._stats.add(fname, 'convert', time.perf_counter() - time_start)
+            return fname, table
+
+        def tables_fname(tables):
+            for fname, table in tables:
+                fname_table[0] = fname
+                yield table
+
+        dfs = self._read_csv_yield_all(fname_list)
+        if pipeline:
+            tables = _iter_threaded(map(convert, _iter_threaded(dfs, queue_size)), queue_size)
+        else:
+            tables = map(convert, dfs)
+        tables = tables_fname(tables)
+        if row_group_size:
+            tables = _tables_coalesce(tables, row_group_size)
+            write_params = dict(write_params, row_group_size=row_group_size)
+
+        pqwriter = pq.ParquetWriter(filename, pqschema, compression=compression, use_dictionary=use_dictionary)
+        try:
+            for table in tables:
+                time_start = time.perf_counter()
+                pqwriter.write_table(table, **write_params)
+                self._stats_write(fname_table[0], time.perf_counter() - time_start, rows=table.num_rows, bytes_out=table.nbytes)
+        finally:
+            pqwriter.close()
+        if manifest:
+            manifest.update(fname_list, self.df_combine_preview.columns)
+            return fdir
         return filename
 
-    def to_sql_combine(self, uri, tablename, if_exists='fail', write_params=None, return_create_sql=False):
+    @_stats_collect
+    def to_sql_combine(self, uri, tablename, if_exists='fail', write_params=None, return_create_sql=False,
+                       manifest=None, if_changed='warn', batch_size=None, method=None):
         """
         Load all files into a sql table using sqlalchemy. Generic but slower than the optmized functions
 
@@ -513,6 +1470,10 @@ class CombinerCSV(object, metaclass=d6tcollect.Collect):
             if_exists (str): {‘fail’, ‘replace’, ‘append’}, default ‘fail’. See `pandas.to_sql()` for details
             write_params (dict): additional params to pass to `pandas.to_sql()`
             return_create_sql (dict): show create sql statement for combined file schema. Doesn't run data load
+            manifest (str): path to manifest file for incremental mode. Only files not in the manifest get appended to the table
+            if_changed (str): {'warn', 'raise', 'append'}, see `to_csv_combine()`
+            batch_size (int): rows per insert batch, passed to `pandas.to_sql(chunksize)`. Default inserts each chunk in one batch
+            method (str): insert method passed to `pandas.to_sql()`. None uses executemany with a prepared statement, 'multi' uses multi-row VALUES inserts which is faster for some databases
 
         Returns:
             bool: True if loader finished
@@ -524,6 +1485,10 @@ class CombinerCSV(object, metaclass=d6tcollect.Collect):
             write_params['if_exists'] = if_exists
         if 'index' not in write_params:
             write_params['index'] = False
+        if batch_size is not None:
+            write_params['chunksize'] = int(batch_size)
+        if method is not None:
+            write_params['method'] = method
         self._combine_preview_available()
 
         if 'mysql' in uri and not 'mysql+pymysql' in uri:
@@ -539,25 +1504,62 @@ class CombinerCSV(object, metaclass=d6tcollect.Collect):
         if return_create_sql:
             return pd.io.sql.get_schema(dfhead, tablename).replace('"',"`")
 
+        fname_list = self.fname_list
+        if manifest:
+            manifest, fname_list = self._manifest_prep(manifest, if_changed)
+            if manifest.files:
+                write_params['if_exists'] = 'append'
+
         dfhead.to_sql(tablename, sql_engine, **write_params)
 
-        # append data
+        # append data, one connection and transaction per file
         write_params['if_exists'] = 'append'
-        for fname in self.fname_list:
-            for dfc in self._read_csv_yield(fname, self.read_csv_params):
-                dfc.astype(self.df_combine_preview.dtypes).to_sql(tablename, sql_engine, **write_params)
+        for fname in fname_list:
+            time_file = time.perf_counter()
+            with sql_engine.begin() as sql_cnxn:
+                for dfc in self._read_csv_yield(fname, self.read_csv_params):
+                    time_start = time.perf_counter()
+                    dfc = self._astype_preview(dfc)
+                    time_write = time.perf_counter()
+                    dfc.to_sql(tablename, sql_cnxn, **write_params)
+                    self._stats.add(fname, 'convert', time_write - time_start)
+                    self._stats_write(fname, time.perf_counter() - time_write, rows=len(dfc))
+            self._to_sql_log(fname, time_file)
+
+        if manifest:
+            manifest.update(fname_list, self.df_combine_preview.columns)
+        return True
+
+    def _to_sql_log(self, fname, time_file):
+        if self.logger:
+            nrows, time_file = self._stats.file(fname)['rows'], time.perf_counter() - time_file
+            self.logger.send_log('loaded {}: {} rows, {:.0f} rows/sec'.format(ntpath.basename(fname), nrows, nrows / max(time_file, 1e-9)), 'ok')
 
+    def _to_psql_files(self, sql_engine, table_name, fname_list, sep):
+        # COPY files over one connection in one transaction
+        sql_cnxn = sql_engine.raw_connection()
+        try:
+            cursor = sql_cnxn.cursor()
+            dfs = ((fname, self._astype_preview(dfc)) for fname in fname_list for dfc in self._read_csv_yield(fname, self.read_csv_params))
+            sql_copy = "COPY {} FROM STDIN WITH (FORMAT csv, DELIMITER '{}')".format(table_name, sep)
+            cursor.copy_expert(sql_copy, _CSVStream(dfs, {'index': False, 'header': False, 'sep': sep}, on_block=self._stats_block))
+            sql_cnxn.commit()
+            cursor.close()
+        finally:
+            sql_cnxn.close()
         return True
 
-    def to_psql_combine(self, uri, table_name, if_exists='fail', sep=','):
+    @_stats_collect
+    def to_psql_combine(self, uri, table_name, if_exists='fail', sep=',', n_connections=1):
         """
-        Load all files into a sql table using native postgres COPY FROM. Chunks data load to reduce memory consumption
+        Load all files into a sql table using native postgres COPY FROM. Streams data to the database to reduce memory consumption
 
         Args:
             uri (str): postgres psycopg2 sqlalchemy database uri
             table_name (str): table to store data in
             if_exists (str): {‘fail’, ‘replace’, ‘append’}, default ‘fail’. See `pandas.to_sql()` for details
             sep (str): separator for temp file, eg ',' or '\t'
+            n_connections (int): number of parallel connections, each loads a separate set of files in its own transaction. If one connection fails, files loaded by the others stay committed, a warning lists them
 
         Returns:
             bool: True if loader finished
@@ -570,26 +1572,147 @@ class CombinerCSV(object, metaclass=d6tcollect.Collect):
         self._combine_preview_available()
 
         import sqlalchemy
-        import io
 
         sql_engine = sqlalchemy.create_engine(uri)
-        sql_cnxn = sql_engine.raw_connection()
-        cursor = sql_cnxn.cursor()
 
         self.df_combine_preview[:0].to_sql(table_name, sql_engine, if_exists=if_exists, index=False)
 
-        for fname in self.fname_list:
-            for dfc in self._read_csv_yield(fname, self.read_csv_params):
-                fbuf = io.StringIO()
-                dfc.astype(self.df_combine_preview.dtypes).to_csv(fbuf, index=False, header=False, sep=sep)
-                fbuf.seek(0)
-                cursor.copy_from(fbuf, table_name, sep=sep, null='')
-        sql_cnxn.commit()
-        cursor.close()
+        if n_connections > 1:
+            fname_lists = [self.fname_list[i::n_connections] for i in range(n_connections)]
+            with concurrent.futures.ThreadPoolExecutor(max_workers=n_connections) as executor:
+                futures = [executor.submit(self._to_psql_files, sql_engine, table_name, fname_list, sep) for fname_list in fname_lists]
+            errors = [future.exception() for future in futures if future.exception() is not None]
+            if errors:
+                fnames_committed = [fname for future, fname_list in zip(futures, fname_lists) if future.exception() is None for fname in fname_list]
+                warnings.warn('loading failed, files committed by other connections: {}'.format(fnames_committed))
+                raise errors[0]
+        else:
+            self._to_psql_files(sql_engine, table_name, self.fname_list, sep)
+
+        return True
+
+    @_stats_collect
+    def to_sqlite_combine(self, filename, table_name, if_exists='fail', index=None, journal_mode='WAL', cache_size_mb=256):
+        """
+        Load all files into a sqlite table. Tunes the database for bulk loading and inserts each file with executemany in a single transaction. Much faster than `to_sql_combine()` for sqlite
+
+        Args:
+            filename (str): path to sqlite database, gets created if it doesn't exist
+            table_name (str): table to store data in
+            if_exists (str): {‘fail’, ‘replace’, ‘append’}, default ‘fail’. See `pandas.to_sql()` for details
+            index (list): columns to index, eg `['date']` or `[['date','filename']]` for a multi-column index. Indexes are created after all data is loaded
+            journal_mode (str): sqlite journal mode during load, eg 'WAL' or 'OFF'. 'OFF' is fastest but the database can get corrupted if the load is interrupted. The previous journal mode is restored after the load
+            cache_size_mb (int): sqlite page cache size in MB
+
+        Returns:
+            bool: True if loader finished
+
+        """
+        import sqlite3
+
+        if if_exists not in ['fail', 'replace', 'append']:
+            raise ValueError("Possible values of 'if_exists' are 'fail', 'replace' and 'append'")
+        if str(journal_mode).upper() not in ['DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF']:
+            raise ValueError("Possible values of 'journal_mode' are 'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL' and 'OFF'")
+
+        self._combine_preview_available()
+        assert _direxists(filename, self.logger)
+
+        def quote(name):
+            return '"{}"'.format(str(name).replace('"', '""'))
+
+        dfhead = self.df_combine_preview.astype(self.df_combine_preview.dtypes)[:0]
+
+        cnxn = sqlite3.connect(filename, isolation_level=None)
+        journal_mode_prev = None
+        try:
+            # journal mode is stored in the database file, gets restored after the load
+            journal_mode_prev = cnxn.execute('PRAGMA journal_mode').fetchone()[0]
+            cnxn.execute('PRAGMA journal_mode={}'.format(journal_mode))
+            cnxn.execute('PRAGMA synchronous=OFF')
+            cnxn.execute('PRAGMA cache_size={}'.format(-int(cache_size_mb * 1024)))
+            cnxn.execute('PRAGMA temp_store=MEMORY')
+
+            # create table
+            is_exists = cnxn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table_name,)).fetchone()
+            if is_exists and if_exists == 'fail':
+                raise ValueError('Table {} already exists'.format(table_name))
+            elif is_exists and if_exists == 'replace':
+                cnxn.execute('DROP TABLE {}'.format(quote(table_name)))
+            if not is_exists or if_exists == 'replace':
+                cnxn.execute(pd.io.sql.get_schema(dfhead, table_name, con=cnxn))
+
+            # append data, one transaction per file
+            sql_insert = 'INSERT INTO {} ({}) VALUES ({})'.format(quote(table_name), ','.join(quote(c) for c in dfhead.columns), ','.join(['?'] * dfhead.shape[1]))
+            for fname in self.fname_list:
+                time_file = time.perf_counter()
+                cnxn.execute('BEGIN')
+                try:
+                    for dfc in self._read_csv_yield(fname, self.read_csv_params):
+                        time_start = time.perf_counter()
+                        dfc = self._astype_preview(dfc)
+                        for col in dfc.select_dtypes(include=['datetime', 'datetimetz']).columns:
+                            dfc[col] = dfc[col].astype(str)
+                        dfc = dfc.astype(object).where(dfc.notna(), None)
+                        time_write = time.perf_counter()
+                        cnxn.executemany(sql_insert, dfc.itertuples(index=False, name=None))
+                        self._stats.add(fname, 'convert', time_write - time_start)
+                        self._stats_write(fname, time.perf_counter() - time_write, rows=len(dfc))
+                    cnxn.execute('COMMIT')
+                except:
+                    cnxn.execute('ROLLBACK')
+                    raise
+                self._to_sql_log(fname, time_file)
+
+            # create indexes after load
+            for cols in index or []:
+                cols = [cols] if isinstance(cols, str) else list(cols)
+                sql_index = 'CREATE INDEX IF NOT EXISTS {} ON {} ({})'.format(quote('ix_{}_{}'.format(table_name, '_'.join(cols))), quote(table_name), ','.join(quote(c) for c in cols))
+                if self.logger:
+                    self.logger.send_log('creating index on ' + ','.join(cols), 'ok')
+                cnxn.execute(sql_index)
+        finally:
+            try:
+                if journal_mode_prev is not None:
+                    cnxn.execute('PRAGMA journal_mode={}'.format(journal_mode_prev))
+            finally:
+                cnxn.close()
 
         return True
 
-    def to_mysql_combine(self, uri, table_name, if_exists='fail', tmpfile='mysql.csv', sep=','):
+    def _to_mysql_chunked(self, sql_engine, table_name, tmpfile, sep):
+        # temp file per chunk is written in a background thread while the previous one is loading
+        assert _direxists(tmpfile, self.logger)
+        tmpfile_root, tmpfile_ext = os.path.splitext(tmpfile)
+        tmpfiles = []
+
+        def write_tmpfiles():
+            for i, (fname, dfc) in enumerate(self._read_csv_yield_all(self.fname_list)):
+                fname_tmp = '{}-{:06d}{}'.format(tmpfile_root, i, tmpfile_ext)
+                tmpfiles.append(fname_tmp)
+                time_start = time.perf_counter()
+                dfc.to_csv(fname_tmp, na_rep='\\N', sep=sep, index=False, header=False)
+                self._stats.add(fname, 'convert', time.perf_counter() - time_start)
+                yield fname, fname_tmp, len(dfc)
+
+        try:
+            for fname, fname_tmp, nrows in _iter_threaded(write_tmpfiles(), queue_size=1):
+                if self.logger:
+                    self.logger.send_log('loading ' + fname_tmp, 'ok')
+                time_start = time.perf_counter()
+                sql_load = "LOAD DATA LOCAL INFILE '{}' INTO TABLE {} FIELDS TERMINATED BY '{}';".format(fname_tmp, table_name, sep)
+                sql_engine.execute(sql_load)
+                self._stats_write(fname, time.perf_counter() - time_start, rows=nrows, bytes_out=os.path.getsize(fname_tmp))
+                os.remove(fname_tmp)
+        finally:
+            for fname_tmp in tmpfiles:
+                if os.path.exists(fname_tmp):
+                    os.remove(fname_tmp)
+
+        return True
+
+    @_stats_collect
+    def to_mysql_combine(self, uri, table_name, if_exists='fail', tmpfile='mysql.csv', sep=',', chunked=False):
         """
         Load all files into a sql table using native postgres LOAD DATA LOCAL INFILE. Chunks data load to reduce memory consumption
 
@@ -599,6 +1722,7 @@ class CombinerCSV(object, metaclass=d6tcollect.Collect):
             if_exists (str): {‘fail’, ‘replace’, ‘append’}, default ‘fail’. See `pandas.to_sql()` for details
             tmpfile (str): filename for temporary file to load from
             sep (str): separator for temp file, eg ',' or '\t'
+            chunked (bool): write one temp file per chunk, eg `mysql-000000.csv`, and load it while the next chunk is processed. Each temp file is removed once loaded
 
         Returns:
             bool: True if loader finished
@@ -615,18 +1739,24 @@ class CombinerCSV(object, metaclass=d6tcollect.Collect):
 
         self.df_combine_preview[:0].to_sql(table_name, sql_engine, if_exists=if_exists, index=False)
 
+        if chunked:
+            return self._to_mysql_chunked(sql_engine, table_name, tmpfile, sep)
+
         if self.logger:
             self.logger.send_log('creating ' + tmpfile, 'ok')
         self.to_csv_combine(tmpfile, write_params={'na_rep':'\\N','sep':sep})
         if self.logger:
             self.logger.send_log('loading ' + tmpfile, 'ok')
         sql_load = "LOAD DATA LOCAL INFILE '{}' INTO TABLE {} FIELDS TERMINATED BY '{}' IGNORE 1 LINES;".format(tmpfile, table_name, sep)
+        time_start = time.perf_counter()
         sql_engine.execute(sql_load)
+        self._stats_write_load(time.perf_counter() - time_start)
 
         os.remove(tmpfile)
 
         return True
 
+    @_stats_collect
     def to_mssql_combine(self, uri, table_name, schema_name=None, if_exists='fail', tmpfile='mysql.csv'):
         """
         Load all files into a sql table using native postgres LOAD DATA LOCAL INFILE. Chunks data load to reduce memory consumption
@@ -660,8 +1790,10 @@ class CombinerCSV(object, metaclass=d6tcollect.Collect):
             self.logger.send_log('loading ' + tmpfile, 'ok')
         if schema_name is not None:
             table_name = '{}.{}'.format(schema_name,table_name)
-        sql_load = "BULK INSERT {} FROM '{}';".format()(table_name, tmpfile)
+        sql_load = "BULK INSERT {} FROM '{}';".format(table_name, tmpfile)
+        time_start = time.perf_counter()
         sql_engine.execute(sql_load)
+        self._stats_write_load(time.perf_counter() - time_start)
 
         os.remove(tmpfile)
 
@@ -5,6 +5,7 @@ import numpy as np
 import pandas as pd
 
 import ntpath
+import time
 
 import openpyxl
 import xlrd
@@ -14,6 +15,7 @@ try:
 except:
     from openpyxl.utils import coordinate_from_string
 from d6tstack.helpers import compare_pandas_versions, check_valid_xls
+from d6tstack.utils import logger_hooks
 
 import d6tcollect
 # d6tcollect.init(__name__)
@@ -222,13 +224,14 @@ class XLStoBase(object, metaclass=d6tcollect.Collect):
         Args:
             if_exists (str): Possible values: skip and replace, default: skip, optional
             output_dir (str): If present, file is saved in given directory, optional
-            logger (object): logger object with send_log('msg','status'), optional
+            logger (object): logger object with send_log('msg','status'), optional. Can implement event hooks, see `d6tstack.utils.LoggerHooks`
 
         """
 
         if if_exists not in ['skip', 'replace']:
             raise ValueError("Possible value of 'if_exists' are 'skip' and 'replace'")
         self.logger = logger
+        self._hooks = logger_hooks(logger)
         self.if_exists = if_exists
         self.output_dir = output_dir
         if self.output_dir:
@@ -268,8 +271,23 @@ class XLStoBase(object, metaclass=d6tcollect.Collect):
         fname_out = fname + '-' + str(sheet_name) + '.csv'
         fname_out, is_skip = self._get_output_filename(fname_out)
         if not is_skip:
+            hooks = self._hooks
+            source = self.__class__.__name__
+            if hooks.on_file_start is not None:
+                hooks.on_file_start({'source': source, 'fname': fname, 'sheet_name': sheet_name})
+            time_start = time.perf_counter()
             df = read_excel_advanced(fname, sheet_name=sheet_name, **kwds)
+            time_write = time.perf_counter()
+            if hooks.on_chunk is not None:
+                hooks.on_chunk({'source': source, 'fname': fname, 'sheet_name': sheet_name, 'rows': len(df), 'seconds': time_write - time_start})
             df.to_csv(fname_out, index=False)
+            time_end = time.perf_counter()
+            if hooks.on_output_flush is not None:
+                hooks.on_output_flush({'source': source, 'output': 'csv', 'fname': fname, 'sheet_name': sheet_name, 'filename': fname_out, 'rows': len(df),
+                                       'bytes': os.path.getsize(fname_out), 'seconds': time_end - time_write})
+            if hooks.on_file_end is not None:
+                hooks.on_file_end({'source': source, 'fname': fname, 'sheet_name': sheet_name, 'rows': len(df),
+                                   'seconds': time_end - time_start, 'bytes': os.path.getsize(fname)})
         else:
             warnings.warn('File %s exists, skipping' %fname)
 
@@ -293,7 +311,7 @@ class XLStoCSVMultiFile(XLStoBase, metaclass=d6tcollect.Collect):
         cfg_xls_sheets_sel (dict): values to select tabs `{'filename':'value'}`
         output_dir (str): If present, file is saved in given directory, optional
         if_exists (str): Possible values: skip and replace, default: skip, optional
-        logger (object): logger object with send_log('msg','status'), optional
+        logger (object): logger object with send_log('msg','status'), optional. Can implement event hooks, see `d6tstack.utils.LoggerHooks`
 
     """
 
@@ -386,7 +404,7 @@ class XLStoCSVMultiSheet(XLStoBase, metaclass=d6tcollect.Collect):
         sheet_names (list): list of int or str. If not given, will convert all sheets in the file
         output_dir (str): If present, file is saved in given directory, optional
         if_exists (str): Possible values: skip and replace, default: skip, optional
-        logger (object): logger object with send_log('msg','status'), optional
+        logger (object): logger object with send_log('msg','status'), optional. Can implement event hooks, see `d6tstack.utils.LoggerHooks`
 
     """
 
@@ -1,9 +1,12 @@
 import boto3
 import botocore
 import os
+import time
 import ftputil
 import numpy as np
 
+from .utils import logger_hooks
+
 
 class FTPSync:
     """
@@ -19,7 +22,7 @@ class FTPSync:
             cfg_s3_secret (string): AWS S3 secret for connection
             bucket_name (string): Bucket name in s3 for syncing the files
             local_dir (string): local dir path to be used for sync. dir will be created if not exist.
-            logger (object): logger object with send_log()
+            logger (object): logger object with send_log(). Can implement event hooks, see `d6tstack.utils.LoggerHooks`
 
         """
     def __init__(self, cfg_ftp_host, cfg_ftp_usr, cfg_ftp_pwd, cfg_ftp_dir,
@@ -57,6 +60,7 @@ class FTPSync:
         if not os.path.exists(local_dir):
             os.makedirs(local_dir)
         self.logger = logger
+        self._hooks = logger_hooks(logger)
 
     def get_all_files(self, subdirs=True, ftp=False):
         """
@@ -159,6 +163,26 @@ class FTPSync:
             file_dir_local = os.path.dirname(local_path)
             if not os.path.exists(file_dir_local):
                 os.makedirs(file_dir_local)
-            self.ftp_host.download(full_name, local_path)
+            hooks = self._hooks
+            if hooks.on_file_start is not None:
+                hooks.on_file_start({'source': 'FTPSync', 'fname': full_name})
+            callback = None
+            if hooks.on_chunk is not None:
+                def callback(chunk, full_name=full_name):
+                    hooks.on_chunk({'source': 'FTPSync', 'fname': full_name, 'bytes': len(chunk)})
+            time_start = time.perf_counter()
+            self.ftp_host.download(full_name, local_path, callback=callback)
+            time_end = time.perf_counter()
+            nbytes = os.path.getsize(local_path)
+            if hooks.on_output_flush is not None:
+                hooks.on_output_flush({'source': 'FTPSync', 'output': 'local', 'fname': full_name, 'filename': local_path,
+                                       'bytes': nbytes, 'seconds': time_end - time_start})
             if to_s3:
+                time_s3 = time.perf_counter()
                 self.upload_to_s3(ftp_file, local_path)
+                time_end = time.perf_counter()
+                if hooks.on_output_flush is not None:
+                    hooks.on_output_flush({'source': 'FTPSync', 'output': 's3', 'fname': full_name, 'filename': 's3://{}/{}'.format(self.bucket_name, ftp_file),
+                                           'bytes': nbytes, 'seconds': time_end - time_s3})
+            if hooks.on_file_end is not None:
+                hooks.on_file_end({'source': 'FTPSync', 'fname': full_name, 'bytes': nbytes, 'seconds': time_end - time_start})
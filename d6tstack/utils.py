@@ -12,6 +12,122 @@ class PrintLogger(object):
         print(data)
 
 import os
+import time
+import collections
+
+_logger_hook_names = ['on_file_start', 'on_chunk', 'on_file_end', 'on_output_flush']
+
+class LoggerHooks(collections.namedtuple('LoggerHooks', _logger_hook_names)):
+    """
+    Event hooks a logger object can implement next to `send_log()`, eg to attach progress bars, profilers or metrics exporters. All hooks are optional and get called with one dict with details of the event. Hooks which aren't implemented cost nothing
+
+    * ``on_file_start(event)``: before an input file is read. source, fname
+    * ``on_chunk(event)``: after a chunk is read and processed. source, fname, rows, seconds
+    * ``on_file_end(event)``: after an input file is read. source, fname, rows, seconds, bytes
+    * ``on_output_flush(event)``: after data is written to the output. source, output, fname, rows, bytes, seconds
+
+    `source` is the class sending the event, eg 'CombinerCSV'. `fname` is the input file, `filename` the output file if there is one. Sources can add details, eg `sheet_name` for Excel files, and `FTPSync` sends `on_chunk` with the bytes of each downloaded block. With worker processes hooks run in the workers
+
+    """
+    __slots__ = ()
+
+def logger_hooks(logger):
+    """
+    Looks up event hooks implemented by a logger
+
+    Args:
+        logger (object): logger object, can be None
+
+    Returns:
+        LoggerHooks: hook functions, None for hooks the logger doesn't implement
+    """
+    return LoggerHooks(*[getattr(logger, name, None) for name in _logger_hook_names])
+
+class CombineStats(object):
+    """
+    Timing and throughput of a `CombinerCSV.to_*()` run, available as `CombinerCSV.stats` after it finishes
+
+    Stages are 'open' the input file, 'parse' csv, 'filter' rows with `row_filter`, 'align' columns and add filename, 'apply' `apply_after_read`, 'convert' to the output format and 'write' to the output. Pipelined outputs run stages in parallel so stage times can add up to more than the total time
+
+    Args:
+        output (str): name of output function, eg 'to_csv_combine'
+
+    """
+
+    stages = ['open', 'parse', 'filter', 'align', 'apply', 'convert', 'write']
+
+    def __init__(self, output):
+        self.output = output
+        self.files = {}
+        self.time_start = time.perf_counter()
+        self.seconds = None
+
+    def file(self, fname):
+        """
+        Stats of an input file: rows, bytes_in, bytes_out and seconds per stage. bytes_out are bytes written for csv outputs and sql loads from csv text, and in memory arrow size of the converted data for parquet outputs, before compression. Other outputs don't record bytes_out
+        """
+        stats_file = self.files.get(fname)
+        if stats_file is None:
+            stats_file = dict(rows=0, bytes_in=os.path.getsize(fname) if os.path.exists(fname) else 0, bytes_out=0)
+            stats_file.update((stage, 0.) for stage in self.stages)
+            self.files[fname] = stats_file
+        return stats_file
+
+    def add(self, fname, stage, seconds, rows=0, bytes_out=0):
+        """
+        Records time spent on a stage of an input file
+        """
+        stats_file = self.file(fname)
+        stats_file[stage] += seconds
+        stats_file['rows'] += rows
+        stats_file['bytes_out'] += bytes_out
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.time_start
+
+    def _total(self, key):
+        return sum(stats_file[key] for stats_file in self.files.values())
+
+    @property
+    def rows(self):
+        return self._total('rows')
+
+    @property
+    def bytes_in(self):
+        return self._total('bytes_in')
+
+    @property
+    def bytes_out(self):
+        return self._total('bytes_out')
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / max(self.seconds or 0, 1e-9)
+
+    @property
+    def mb_per_sec(self):
+        """Input MB per second"""
+        return self.bytes_in / 1e6 / max(self.seconds or 0, 1e-9)
+
+    def summary(self):
+        """
+        Stats per input file
+
+        Returns:
+            dataframe: rows, bytes, seconds per stage, rows/sec and MB/sec for each file
+        """
+        df = pd.DataFrame.from_dict(self.files, orient='index', columns=['rows', 'bytes_in', 'bytes_out'] + self.stages)
+        df.index.name = 'filename'
+        df['seconds'] = df[self.stages].sum(axis=1)
+        seconds = df['seconds'].clip(lower=1e-9)
+        df['rows_per_sec'] = df['rows'] / seconds
+        df['mb_per_sec'] = df['bytes_in'] / 1e6 / seconds
+        return df
+
+    def __repr__(self):
+        return '{}: {} files, {} rows in {:.2f}s, {:.0f} rows/sec, {:.1f} MB/sec'.format(
+            self.output, len(self.files), self.rows, self.seconds or 0, self.rows_per_sec, self.mb_per_sec)
+
 
 @d6tcollect.collect
 def pd_readsql_query_from_sqlengine(uri, sql, schema_name=None, connect_args=None):
@@ -25,6 +25,7 @@ Notes:
 from d6tstack.combine_csv import *
 from d6tstack.sniffer import CSVSniffer
 import d6tstack.utils
+import d6tstack.cache
 
 import math
 import pandas as pd
@@ -47,10 +48,10 @@ cnxn_string = 'sqlite:///test-data/db/{}.db'
 #************************************************************
 class DebugLogger(object):
     def __init__(self, event):
-        pass
+        self.log = []
         
     def send_log(self, msg, status):
-        pass
+        self.log.append(msg)
 
     def send(self, data):
         pass
@@ -321,6 +322,62 @@ def test_csv_sniff(create_files_csv, create_files_csv_colmismatch, create_files_
     assert not combiner.is_all_equal()
     assert combiner.sniff_results['df_columns_order']['profit'].values.tolist() == [3, 3, 2]
 
+    # threaded
+    for fnames in [create_files_csv_colmismatch, create_files_csv_colreorder]:
+        r = CombinerCSV(fname_list=fnames).sniff_columns()
+        r2 = CombinerCSV(fname_list=fnames, sniff_workers=2).sniff_columns()
+        assert r2['files_columns'] == r['files_columns']
+        assert list(r2['files_columns'].keys()) == list(r['files_columns'].keys())
+        assert r2['df_columns_present'].equals(r['df_columns_present'])
+        assert r2['df_columns_order'].equals(r['df_columns_order'])
+
+    # header only
+    for fnames in [create_files_csv_colmismatch, create_files_csv_colreorder]:
+        c = CombinerCSV(fname_list=fnames)
+        c2 = CombinerCSV(fname_list=fnames, sniff_header_only=True)
+        assert c2.sniff_columns()['files_columns'] == c.sniff_columns()['files_columns']
+        assert c2.sniff_results['df_columns_order'].equals(c.sniff_results['df_columns_order'])
+        assert c2.dfl_all == [None]*3
+        assert all(c2.head()[fname].equals(c.head()[fname]) for fname in c.fname_list)
+
+
+def test_csv_sniff_cache(create_files_csv_colmismatch):
+    fname_cache = 'test-data/output/sniff-cache.db'
+    if os.path.exists(fname_cache):
+        os.remove(fname_cache)
+    fnames = [fname.replace('.csv', '-cache.csv') for fname in create_files_csv_colmismatch]
+    for fname_in, fname in zip(create_files_csv_colmismatch, fnames):
+        shutil.copy(fname_in, fname)
+
+    c = CombinerCSV(fname_list=fnames, sniff_cache=fname_cache)
+    r = c.sniff_columns()
+    assert len(d6tstack.cache.SniffCache(fname_cache, {}).get(fnames)) == 0 # different settings
+    cache = c._sniff_cache()
+    assert list(cache.get(fnames).keys()) == fnames
+
+    c2 = CombinerCSV(fname_list=fnames, sniff_cache=fname_cache)
+    r2 = c2.sniff_columns()
+    assert r2['files_columns'] == r['files_columns']
+    assert r2['df_columns_order'].equals(r['df_columns_order'])
+    assert all(c2.head()[fname].equals(c.head()[fname]) for fname in fnames)
+
+    # changed file gets sniffed again
+    df = pd.read_csv(fnames[0])
+    df['profit3'] = 1
+    df.to_csv(fnames[0], index=False)
+    assert list(cache.get(fnames).keys()) == fnames[1:]
+    r3 = CombinerCSV(fname_list=fnames, sniff_cache=fname_cache).sniff_columns()
+    assert r3['files_columns'][fnames[0]] == ['date', 'sales', 'cost', 'profit', 'profit3']
+    assert list(cache.get(fnames).keys()) == fnames
+
+    # header only caches columns, preview once loaded
+    c4 = CombinerCSV(fname_list=fnames, sniff_cache=fname_cache, sniff_header_only=True)
+    c4.sniff_columns()
+    cache = c4._sniff_cache()
+    assert [df is None for _, df in cache.get(fnames).values()] == [True]*3
+    c4.head()
+    assert [df is None for _, df in cache.get(fnames).values()] == [False]*3
+
 
 def test_csv_selectrename(create_files_csv, create_files_csv_colmismatch):
 
@@ -376,6 +433,309 @@ def test_to_pandas(create_files_csv, create_files_csv_colmismatch, create_files_
     assert df.shape == (30, 2)
     assert 'profit3' in df.columns and not 'profit2' in df.columns
 
+def test_to_pandas_align(create_files_csv_colreorder, create_files_csv_col_renamed, create_files_csv_colmismatch):
+    def helper(c):
+        # compare to label based rename+reindex
+        df = c.to_pandas()
+        dfchk = []
+        for fname in c.fname_list:
+            dfg = pd.read_csv(fname).rename(columns=c._columns_rename_dict.get(fname, {})).reindex(columns=c._columns_reindex)
+            dfg['filepath'] = fname
+            dfg['filename'] = os.path.basename(fname)
+            dfchk.append(dfg)
+        dfchk = pd.concat(dfchk, ignore_index=True)
+        assert df.equals(dfchk)
+
+    helper(CombinerCSV(fname_list=create_files_csv_colreorder))
+    helper(CombinerCSV(fname_list=create_files_csv_col_renamed, columns_rename={'revenue':'sales'}))
+    helper(CombinerCSV(fname_list=create_files_csv_col_renamed, columns_rename={'revenue':'sales'}, columns_select=['cost','sales']))
+    helper(CombinerCSV(fname_list=create_files_csv_colmismatch))
+    helper(CombinerCSV(fname_list=create_files_csv_colmismatch, columns_select=['profit2','date']))
+    helper(CombinerCSV(fname_list=create_files_csv_colmismatch, columns_select_common=True))
+
+    # unused columns are not parsed
+    c = CombinerCSV(fname_list=create_files_csv_col_renamed, columns_rename={'revenue':'sales'}, columns_select=['cost','sales'])
+    helper(c)
+    assert [c._read_csv_params_file(fname, {})['usecols'] for fname in c.fname_list] == [[1,3]]*3
+    c = CombinerCSV(fname_list=create_files_csv_colmismatch, read_csv_params={'parse_dates':['date']}, columns_select=['sales'], add_filename=False)
+    assert c.to_pandas().columns.tolist() == ['sales'] and sorted(c.to_pandas()['sales']) == [100]*10+[200]*10+[300]*10
+    c = CombinerCSV(fname_list=create_files_csv_col_renamed, columns_select=['cost','sales'], read_engine='pyarrow')
+    assert [c._read_csv_params_file(fname, {})['usecols'] for fname in c.fname_list] == [['sales','cost'],['sales','cost'],['cost']]
+    assert c.to_pandas()['sales'].isnull().sum() == 10
+
+    # chunk labels in different order than sniffed columns
+    for read_engine in ['pandas', 'pyarrow']:
+        c = CombinerCSV(fname_list=create_files_csv_colmismatch, read_csv_params={'usecols':['cost','date']}, read_engine=read_engine)
+        df = c.to_pandas()
+        assert df['date'].str.startswith('2011').all() and (df['cost'] < 0).all()
+
+def test_to_pandas_workers(create_files_csv_colmismatch):
+    dfchk = CombinerCSV(fname_list=create_files_csv_colmismatch).to_pandas()
+    df = CombinerCSV(fname_list=create_files_csv_colmismatch).to_pandas(n_workers=2)
+    assert df.equals(dfchk)
+    assert df['filepath'].unique().tolist() == sorted(create_files_csv_colmismatch)
+
+def test_to_pandas_pyarrow(create_files_csv_colmismatch, create_files_csv_noheader):
+    for params in [{}, {'chunksize':4}]:
+        dfchk = CombinerCSV(fname_list=create_files_csv_colmismatch, read_csv_params=params.copy()).to_pandas()
+        df = CombinerCSV(fname_list=create_files_csv_colmismatch, read_csv_params=params.copy(), read_engine='pyarrow').to_pandas()
+        assert df.equals(dfchk)
+    df = CombinerCSV(fname_list=create_files_csv_colmismatch, read_engine='pyarrow').combine_preview()
+    assert df.shape == (9, 6+1)
+    assert df.dtypes.tolist() == [np.dtype('O'), np.dtype('int64'), np.dtype('int64'), np.dtype('int64'), np.dtype('float64'), np.dtype('O'), np.dtype('O')]
+
+    params = {'header':None, 'chunksize':7}
+    dfchk = CombinerCSV(fname_list=create_files_csv_noheader, read_csv_params=params.copy()).to_pandas()
+    df = CombinerCSV(fname_list=create_files_csv_noheader, read_csv_params=params.copy(), read_engine='pyarrow').to_pandas()
+    assert df.equals(dfchk)
+
+    fname = 'test-data/output/combined-pyarrow.pq'
+    CombinerCSV(fname_list=create_files_csv_colmismatch, read_engine='pyarrow').to_parquet_combine(fname)
+    assert check_df_colmismatch_combine(pd.read_parquet(fname))
+
+    with pytest.raises(ValueError):
+        CombinerCSV(fname_list=create_files_csv_colmismatch, read_csv_params={'comment':'#'}, read_engine='pyarrow').to_pandas()
+
+    # dates and times are kept as text
+    fname = cfg_fname_base_in+'input-csv-temporal.csv'
+    open(fname, 'w').write('ts,dt,tm,d,v\n2011-01-01T10:00:00Z,2011-01-01 10:00:00,10:00:00,2011-01-01,1\n2011-01-02T10:00:00Z,2011-01-02 10:00:00.5,10:00:01.25,2011-01-02,2\n')
+    for params in [{}, {'chunksize':1}]:
+        dfchk = CombinerCSV(fname_list=[fname], read_csv_params=params.copy()).to_pandas()
+        df = CombinerCSV(fname_list=[fname], read_csv_params=params.copy(), read_engine='pyarrow').to_pandas()
+        assert df.equals(dfchk)
+        assert df['ts'].tolist() == ['2011-01-01T10:00:00Z', '2011-01-02T10:00:00Z'] and df['tm'].tolist() == ['10:00:00', '10:00:01.25']
+
+    # usecols keep file order
+    for usecols in [['cost','date'], [2,0]]:
+        dfchk = next(pd.read_csv(create_files_csv_colmismatch[0], usecols=usecols, chunksize=100))
+        df = next(d6tstack.combine_csv._read_csv_pyarrow(create_files_csv_colmismatch[0], {'usecols':usecols, 'chunksize':100}))
+        assert df.columns.tolist() == dfchk.columns.tolist() == ['date','cost']
+        assert df.equals(dfchk)
+
+def test_to_pandas_pyarrow_blocks():
+    # file larger than pyarrow block size, column b only has values in last block
+    fname = cfg_fname_base_in+'input-csv-blocks.csv'
+    nrows = 200000
+    pd.DataFrame({'a':range(nrows), 'b':[None]*(nrows-10)+['x']*10}).to_csv(fname, index=False)
+    assert os.path.getsize(fname) > 2**20
+
+    dfchk = CombinerCSV(fname_list=[fname]).to_pandas()
+    for params in [{}, {'chunksize':150000}]:
+        with pytest.warns(UserWarning):
+            df = CombinerCSV(fname_list=[fname], read_csv_params=params.copy(), read_engine='pyarrow').to_pandas()
+        assert df.shape == dfchk.shape
+        assert df['a'].equals(dfchk['a'])
+        assert df['b'].tolist()[-11:] == [None]+['x']*10 and df['b'].notnull().sum() == 10
+
+def test_filename_categorical(create_files_csv_colmismatch):
+    dfchk = CombinerCSV(fname_list=create_files_csv_colmismatch).to_pandas()
+    c = CombinerCSV(fname_list=create_files_csv_colmismatch, filename_categorical=True)
+    df = c.to_pandas()
+    assert df['filepath'].dtype.name == 'category' and df['filename'].dtype.name == 'category'
+    assert df['filepath'].cat.categories.tolist() == sorted(create_files_csv_colmismatch)
+    assert df.astype({'filepath':str, 'filename':str}).equals(dfchk)
+
+    # same file listed twice
+    fname_list = create_files_csv_colmismatch + create_files_csv_colmismatch[:1]
+    dfchk2 = CombinerCSV(fname_list=fname_list).to_pandas()
+    df2 = CombinerCSV(fname_list=fname_list, filename_categorical=True).to_pandas()
+    assert len(df2) == 40 and df2.astype({'filepath':str, 'filename':str}).equals(dfchk2)
+
+    fname = 'test-data/output/combined-categorical.pq'
+    c.to_parquet_combine(fname)
+    import pyarrow.parquet as pq
+    assert str(pq.read_schema(fname).field('filename').type).startswith('dictionary')
+    df = pd.read_parquet(fname, engine='pyarrow')
+    assert df['filename'].astype(str).equals(dfchk['filename'])
+
+def test_dtypes_infer(create_files_csv_colmismatch):
+    c = CombinerCSV(fname_list=create_files_csv_colmismatch, dtypes_infer=True)
+    dtypes = c.preview_dtypes()
+    assert dtypes == {'date': np.dtype('O'), 'sales': np.dtype('int64'), 'cost': np.dtype('int64'), 'profit': np.dtype('int64'), 'profit2': np.dtype('float64')}
+    assert c.combine_preview().dtypes.tolist()[:5] == list(dtypes.values())
+    dfchk = CombinerCSV(fname_list=create_files_csv_colmismatch).to_pandas()
+    assert c.to_pandas().equals(dfchk)
+    assert c._read_csv_params_file(c.fname_list[0], {})['dtype'] == {'date': np.dtype('O'), 'sales': np.dtype('int64'), 'cost': np.dtype('int64'), 'profit': np.dtype('int64')}
+    fname = 'test-data/output/combined-dtypes.pq'
+    c.to_parquet_combine(fname)
+    assert check_df_colmismatch_combine(pd.read_parquet(fname))
+
+    # widen
+    fnames = ['test-data/input/test-data-dtypes-%s.csv' % i for i in range(2)]
+    pd.DataFrame({'a':[1,2], 'b':[1,2], 'c':['x','y']}).to_csv(fnames[0], index=False)
+    pd.DataFrame({'a':[1.5,2], 'b':['x','y'], 'c':[np.nan, np.nan]}).to_csv(fnames[1], index=False)
+    for engine in ['pandas', 'pyarrow']:
+        c = CombinerCSV(fname_list=fnames, dtypes_infer=True, read_engine=engine)
+        assert c.preview_dtypes() == {'a': np.dtype('float64'), 'b': np.dtype('O'), 'c': np.dtype('O')}
+        df = c.to_pandas()
+        assert df['b'].tolist() == ['1', '2', 'x', 'y']
+
+    # sample doesn't represent data
+    pd.DataFrame({'a':[1,2,3,'x']}).to_csv(fnames[0], index=False)
+    pd.DataFrame({'a':[1,2,3,4]}).to_csv(fnames[1], index=False)
+    c = CombinerCSV(fname_list=fnames, dtypes_infer=True, dtypes_infer_nrows=2)
+    with pytest.raises(ValueError):
+        c.to_pandas()
+    c = CombinerCSV(fname_list=fnames, dtypes_infer=True, dtypes_infer_nrows=None)
+    assert c.to_pandas()['a'].tolist() == ['1','2','3','x','1','2','3','4']
+
+def test_memory_budget():
+    fname_narrow, fname_wide = cfg_fname_base_out+'budget-narrow.csv', cfg_fname_base_out+'budget-wide.csv'
+    pd.DataFrame({'a': range(100), 'b': ['x'*10]*100}).to_csv(fname_narrow, index=False)
+    pd.DataFrame(dict(('c{}'.format(i), ['y'*10]*100) for i in range(40))).assign(a=range(100)).to_csv(fname_wide, index=False)
+
+    memory_budget = 40000
+    c = CombinerCSV(fname_list=[fname_narrow, fname_wide], memory_budget=memory_budget, log=False)
+    dfs = dict((fname, c._read_csv_all(fname)) for fname in c.fname_list)
+    assert len(dfs[fname_wide]) > len(dfs[fname_narrow]) > 1
+    for dfc in itertools.chain.from_iterable(dfs.values()):
+        assert dfc.memory_usage(index=False, deep=True).sum() <= memory_budget
+    dfchk = CombinerCSV(fname_list=[fname_narrow, fname_wide], log=False).to_pandas()
+    assert c.to_pandas().equals(dfchk)
+
+
+def test_stats(create_files_csv_colmismatch):
+    c = CombinerCSV(fname_list=create_files_csv_colmismatch, chunksize=4, logger=DebugLogger('stats'))
+    assert c.stats is None
+
+    def check(output, stages):
+        assert c.stats.output == output
+        assert c.stats.rows == 30 and c.stats.seconds > 0
+        df = c.stats.summary()
+        assert df.index.tolist() == c.fname_list.tolist()
+        assert df['rows'].tolist() == [10]*3
+        assert (df[stages] > 0).all().all()
+        assert c.stats.rows_per_sec > 0 and c.stats.mb_per_sec > 0
+        assert repr(c.stats) == c.logger.log[-1]
+
+    c.to_pandas()
+    check('to_pandas', ['open', 'parse', 'align'])
+    c.to_pandas(n_workers=2)
+    check('to_pandas', ['open', 'parse', 'align'])
+    fname_out = cfg_fname_base_out+'combined-stats.csv'
+    for pipeline in [False, True]:
+        c.to_csv_combine(fname_out, pipeline=pipeline)
+        check('to_csv_combine', ['parse', 'convert', 'write'])
+        nbytes_header = len(c.df_combine_preview[:0].to_csv(index=False))
+        assert c.stats.bytes_out == os.path.getsize(fname_out) - nbytes_header
+    import pyarrow.parquet as pq
+    fname_out = cfg_fname_base_out+'combined-stats.pq'
+    for row_group_size in [None, 7]:
+        c.to_parquet_combine(fname_out, row_group_size=row_group_size)
+        check('to_parquet_combine', ['parse', 'convert', 'write'])
+        nbytes = pq.read_table(fname_out).nbytes # arrow buffers of chunks are close to but not exactly the same
+        assert abs(c.stats.bytes_out - nbytes) < 0.1*nbytes
+    c.to_parquet_align(output_dir=cfg_fname_base_out_dir, n_workers=2)
+    check('to_parquet_align', ['parse', 'convert', 'write'])
+
+    c = CombinerCSV(fname_list=create_files_csv_colmismatch, apply_after_read=lambda dfg: dfg, logger=DebugLogger('stats'))
+    c.to_csv_align(output_dir=cfg_fname_base_out_dir)
+    check('to_csv_align', ['open', 'parse', 'align', 'apply', 'convert', 'write'])
+
+
+def test_logger_hooks(create_files_csv_colmismatch):
+    class HookLogger(DebugLogger):
+        def __init__(self, event):
+            super().__init__(event)
+            self.events = []
+        def on_file_start(self, event):
+            self.events.append(('on_file_start', event))
+        def on_chunk(self, event):
+            self.events.append(('on_chunk', event))
+        def on_file_end(self, event):
+            self.events.append(('on_file_end', event))
+        def on_output_flush(self, event):
+            self.events.append(('on_output_flush', event))
+
+    logger = HookLogger('hooks')
+    c = CombinerCSV(fname_list=create_files_csv_colmismatch, chunksize=4, logger=logger)
+    c.combine_preview()
+    assert not logger.events
+    c.to_csv_combine(cfg_fname_base_out+'combined-hooks.csv')
+    events = collections.defaultdict(list)
+    for hook, event in logger.events:
+        events[hook].append(event)
+    assert [e['fname'] for e in events['on_file_start']] == c.fname_list.tolist()
+    assert len(events['on_chunk']) == len(events['on_output_flush']) == 9
+    assert sum(e['rows'] for e in events['on_chunk']) == sum(e['rows'] for e in events['on_output_flush']) == 30
+    assert [e['rows'] for e in events['on_file_end']] == [10]*3
+    assert events['on_output_flush'][0]['output'] == 'to_csv_combine'
+    assert logger.events[0][0] == 'on_file_start' and logger.events[-1][0] == 'on_file_end'
+
+    hooks = d6tstack.utils.logger_hooks(DebugLogger('hooks'))
+    assert hooks == (None, None, None, None)
+    hooks = d6tstack.utils.logger_hooks(logger)
+    assert hooks.on_chunk == logger.on_chunk
+
+
+def test_row_filter(create_files_csv_colmismatch):
+    import pyarrow.compute as pc
+    dfall = CombinerCSV(fname_list=create_files_csv_colmismatch).to_pandas()
+    row_filter = "date >= '2011-02-05' and date < '2011-03-03'"
+    dfchk = dfall.query(row_filter).reset_index(drop=True)
+    assert 0 < len(dfchk) < len(dfall)
+
+    for read_engine in ['pandas', 'pyarrow']:
+        c = CombinerCSV(fname_list=create_files_csv_colmismatch, row_filter=row_filter, read_engine=read_engine, chunksize=4)
+        df = c.to_pandas()
+        assert df.equals(dfchk.astype(df.dtypes))
+        assert len(c.combine_preview()) == 3*3 # preview isn't filtered
+    df = CombinerCSV(fname_list=create_files_csv_colmismatch, row_filter=pc.field('date') >= '2011-02-05', read_engine='pyarrow').to_pandas()
+    assert df['date'].min() == '2011-02-05' and len(df) == (dfall['date'] >= '2011-02-05').sum()
+    with pytest.raises(ValueError):
+        CombinerCSV(fname_list=create_files_csv_colmismatch, row_filter=pc.field('date') >= '2011-02-05')
+
+    # filter on column which isn't selected, renamed or missing in some files
+    c = CombinerCSV(fname_list=create_files_csv_colmismatch, columns_select=['sales', 'profit'], add_filename=False, row_filter=row_filter)
+    df = c.to_pandas()
+    assert df.columns.tolist() == ['sales', 'profit'] and len(df) == len(dfchk)
+    assert all(plan['usecols'] is not None for plan in c._columns_plan.values())
+    c = CombinerCSV(fname_list=create_files_csv_colmismatch, columns_rename={'date': 'day'}, row_filter="day >= '2011-02-05'")
+    assert len(c.to_pandas()) == (dfall['date'] >= '2011-02-05').sum()
+    df = CombinerCSV(fname_list=create_files_csv_colmismatch, row_filter='profit2 > 0').to_pandas()
+    assert len(df) == (dfall['profit2'] > 0).sum() and df['profit2'].notnull().all()
+    df = CombinerCSV(fname_list=create_files_csv_colmismatch, row_filter=pc.field('profit2') > 0, read_engine='pyarrow').to_pandas()
+    assert len(df) == (dfall['profit2'] > 0).sum() == 10 and df['profit2'].notnull().all()
+
+
+def test_iter_chunks(create_files_csv_colmismatch):
+    c = CombinerCSV(fname_list=create_files_csv_colmismatch, chunksize=4)
+    dfchk = c.to_pandas()
+
+    dfs = list(c.iter_chunks())
+    assert [len(dfc) for dfc in dfs] == [4, 4, 2]*3
+    for batch_rows, nrows_chk in [(7, [7]*4+[2]), (1, [1]*30), (100, [30])]:
+        dfs = list(c.iter_chunks(batch_rows=batch_rows))
+        assert [len(dfc) for dfc in dfs] == nrows_chk
+        assert all(dfc.dtypes.equals(c.df_combine_preview.dtypes) for dfc in dfs)
+        assert pd.concat(dfs, ignore_index=True).equals(dfchk)
+    dfs = list(c.iter_chunks(batch_bytes=1))
+    assert len(dfs) == 30
+
+    batches = list(c.iter_batches(batch_rows=8))
+    assert [batch.num_rows for batch in batches] == [8, 8, 8, 6]
+    assert all(batch.schema.equals(batches[0].schema) for batch in batches)
+    import pyarrow as pa
+    df = pa.Table.from_batches(batches).to_pandas()
+    assert df.equals(dfchk)
+
+
+def test_to_dask(create_files_csv_colmismatch, create_files_csv_colreorder):
+    for fname_list in [create_files_csv_colmismatch, create_files_csv_colreorder]:
+        c = CombinerCSV(fname_list=fname_list, chunksize=4)
+        ddf = c.to_dask()
+        assert ddf.npartitions == len(fname_list)
+        assert ddf.columns.tolist() == c.df_combine_preview.columns.tolist()
+        dfchk = c.to_pandas()
+        df = ddf.compute().reset_index(drop=True)
+        assert df.equals(dfchk.astype(df.dtypes))
+
+    c = CombinerCSV(fname_list=create_files_csv_colmismatch, filename_categorical=True)
+    df = c.to_dask().compute()
+    assert df['filename'].dtype.name == 'category'
+    assert df.shape == (30, 4+1+2)
+
+
 def test_combinepreview(create_files_csv_colmismatch):
     df = CombinerCSV(fname_list=create_files_csv_colmismatch).combine_preview()
     assert df.shape == (9, 6+1)
@@ -390,7 +750,7 @@ def test_combinepreview(create_files_csv_colmismatch):
     assert df.dtypes.tolist() == [np.dtype('<M8[ns]'), np.dtype('int64'), np.dtype('int64'), np.dtype('int64'), np.dtype('float64'), np.dtype('O'), np.dtype('O')]
 
 
-def test_tocsv(create_files_csv_colmismatch):
+def test_tocsv(create_files_csv_colmismatch, monkeypatch):
     fname = 'test-data/output/combined.csv'
     fnameout = CombinerCSV(fname_list=create_files_csv_colmismatch).to_csv_combine(filename=fname)
     assert fname == fnameout
@@ -404,6 +764,46 @@ def test_tocsv(create_files_csv_colmismatch):
     assert df.columns.tolist() == ['date', 'sales', 'cost', 'profit', 'filepath', 'filename']
     assert check_df_colmismatch_combine(df,is_common=True)
 
+    fnameout = CombinerCSV(fname_list=create_files_csv_colmismatch, chunksize=4).to_csv_combine(filename=fname, pipeline=True)
+    assert pd.read_csv(fname).equals(dfchk)
+
+    # raw copy
+    fnames = ['test-data/input/test-data-raw-%s.csv' % i for i in range(3)]
+    open(fnames[0], 'w').write('a,b\n1,"x,y"\n2,z\n')
+    open(fnames[1], 'w').write('\na,b\n3,z') # blank line, no trailing newline
+    open(fnames[2], 'w').write('a,b\n')
+    dfraw = pd.read_csv(CombinerCSV(fname_list=fnames, add_filename=False).to_csv_combine('test-data/output/combined-parsed.csv'))
+    c = CombinerCSV(fname_list=fnames, add_filename=False)
+    assert c._is_copy_raw({'index':False})
+    c.to_csv_combine(filename=fname, copy_raw=True)
+    assert open(fname).read() == 'a,b\n1,"x,y"\n2,z\n3,z\n'
+    assert pd.read_csv(fname).equals(dfraw)
+    with pytest.warns(UserWarning):
+        CombinerCSV(fname_list=fnames).to_csv_combine(filename=fname, copy_raw=True)
+    assert not CombinerCSV(fname_list=fnames, add_filename=False, columns_rename={'a':'c'})._is_copy_raw({})
+    if hasattr(os, 'sendfile'):
+        nsendfile = []
+        def sendfile(*args):
+            nsendfile.append(args)
+            return sendfile_os(*args)
+        sendfile_os = os.sendfile
+        monkeypatch.setattr(os, 'sendfile', sendfile)
+        CombinerCSV(fname_list=fnames, add_filename=False).to_csv_combine(filename=fname, copy_raw=True)
+        monkeypatch.undo()
+        assert open(fname).read() == 'a,b\n1,"x,y"\n2,z\n3,z\n'
+        assert len(nsendfile) == 2 # zero copy, no fallback
+
+    # compressed files are parsed
+    fnames_gz = ['test-data/input/test-data-raw-%s.csv.gz' % i for i in range(2)]
+    for fname_in, fname_gz in zip(fnames, fnames_gz):
+        pd.read_csv(fname_in).to_csv(fname_gz, index=False)
+    c = CombinerCSV(fname_list=fnames_gz, add_filename=False)
+    assert not c._is_copy_raw({'index':False})
+    with pytest.warns(UserWarning):
+        c.to_csv_combine(filename=fname, copy_raw=True)
+    assert pd.read_csv(fname).equals(dfraw)
+    assert not CombinerCSV(fname_list=create_files_csv_colmismatch, add_filename=False)._is_copy_raw({})
+
     def helper(fdir):
         fnamesout = CombinerCSV(fname_list=create_files_csv_colmismatch).to_csv_align(output_dir=fdir)
         for fname in fnamesout:
@@ -413,6 +813,11 @@ def test_tocsv(create_files_csv_colmismatch):
     helper('test-data/output')
     helper('test-data/output/')
 
+    fnamesout = CombinerCSV(fname_list=create_files_csv_colmismatch).to_csv_align(output_dir='test-data/output/workers', n_workers=2)
+    assert [os.path.basename(fname) for fname in fnamesout] == ['d6tstack-'+os.path.basename(fname) for fname in sorted(create_files_csv_colmismatch)]
+    for fname, fnamechk in zip(fnamesout, CombinerCSV(fname_list=create_files_csv_colmismatch).to_csv_align(output_dir='test-data/output')):
+        assert pd.read_csv(fname).equals(pd.read_csv(fnamechk))
+
     df = dd.read_csv('test-data/output/d6tstack-test-data-input-csv-colmismatch-*.csv')
     df = df.compute()
     assert df.columns.tolist() == ['date', 'sales', 'cost', 'profit', 'profit2', 'filepath', 'filename']
@@ -460,13 +865,216 @@ def test_topq(create_files_csv_colmismatch):
             assert df.columns.tolist() == ['date', 'sales', 'cost', 'profit', 'profit2', 'filepath', 'filename']
     helper('test-data/output')
 
+    fnamesout = CombinerCSV(fname_list=create_files_csv_colmismatch).to_parquet_align(output_dir='test-data/output/workers', n_workers=2)
+    for fname, fnamechk in zip(fnamesout, CombinerCSV(fname_list=create_files_csv_colmismatch).to_parquet_align(output_dir='test-data/output')):
+        assert pd.read_parquet(fname).equals(pd.read_parquet(fnamechk))
+
     df = dd.read_parquet('test-data/output/d6tstack-test-data-input-csv-colmismatch-*.pq')
     df = df.compute()
     assert df.columns.tolist() == ['date', 'sales', 'cost', 'profit', 'profit2', 'filepath', 'filename']
     assert check_df_colmismatch_combine(df)
 
+    # string column missing in first file is all null in its chunk
+    cfg_fname = cfg_fname_base_in+'input-csv-strmissing-%s.csv'
+    pd.DataFrame({'a':[1,2]}).to_csv(cfg_fname % '1', index=False)
+    pd.DataFrame({'a':[3,4], 'b':['x','y']}).to_csv(cfg_fname % '2', index=False)
+    fname = 'test-data/output/combined-strmissing.pq'
+    CombinerCSV(fname_list=[cfg_fname % '1', cfg_fname % '2']).to_parquet_combine(fname)
+    df = pd.read_parquet(fname)
+    assert df['a'].tolist() == [1,2,3,4] and df['b'].tolist() == [None,None,'x','y']
+
     # todo: write tests such that compare to concat df not always repeat same code to test shape and columns
 
+def test_combine_incremental(create_files_csv):
+    fdir = 'test-data/output/incremental'
+    shutil.rmtree(fdir, ignore_errors=True)
+    fnames = [fname.replace('.csv', '-incr.csv') for fname in create_files_csv]
+    for fname_in, fname in zip(create_files_csv, fnames):
+        shutil.copy(fname_in, fname)
+    fname_out = fdir+'/combined.csv'
+    fname_pq = fdir+'/combined-pq'
+    uri = 'sqlite:///'+fdir+'/combined.db'
+
+    def helper(fname_list):
+        c = CombinerCSV(fname_list=fname_list)
+        c.to_csv_combine(fname_out, manifest=fdir+'/manifest-csv.json')
+        c.to_parquet_combine(fname_pq, manifest=fdir+'/manifest-pq.json')
+        c.to_sql_combine(uri, 'combined', manifest=fdir+'/manifest-sql.json')
+
+    def check(nrows):
+        df = pd.read_csv(fname_out)
+        assert df.shape == (nrows, 6)
+        assert df['filename'].nunique() == nrows//10
+        df = pd.read_parquet(fname_pq)
+        assert df.shape == (nrows, 6)
+        df = pd.read_sql_table('combined', sqlalchemy.create_engine(uri))
+        assert df.shape == (nrows, 6)
+
+    helper(fnames[:2])
+    check(20)
+    helper(fnames)
+    check(30)
+    assert len(os.listdir(fname_pq)) == 2
+    helper(fnames) # nothing new
+    check(30)
+
+    # changed files
+    df = pd.read_csv(fnames[0])
+    df.iloc[:5].to_csv(fnames[0], index=False)
+    with pytest.warns(UserWarning):
+        helper(fnames)
+    check(30)
+    with pytest.raises(ValueError):
+        CombinerCSV(fname_list=fnames).to_csv_combine(fname_out, manifest=fdir+'/manifest-csv.json', if_changed='raise')
+    CombinerCSV(fname_list=fnames).to_csv_combine(fname_out, manifest=fdir+'/manifest-csv.json', if_changed='append')
+    assert pd.read_csv(fname_out).shape == (35, 6)
+
+    # schema change
+    df['profit2'] = 1
+    df.to_csv(fnames[0], index=False)
+    with pytest.raises(ValueError):
+        CombinerCSV(fname_list=fnames).to_csv_combine(fname_out, manifest=fdir+'/manifest-csv.json', if_changed='append')
+
+
+def test_topq_pipeline(create_files_csv_colmismatch):
+    import pyarrow.parquet as pq
+    fname = 'test-data/output/combined-pipeline.pq'
+    dfchk = pd.read_parquet(CombinerCSV(fname_list=create_files_csv_colmismatch).to_parquet_combine('test-data/output/combined.pq'))
+    c = CombinerCSV(fname_list=create_files_csv_colmismatch, chunksize=4)
+    c.to_parquet_combine(fname, pipeline=True)
+    assert pd.read_parquet(fname).equals(dfchk)
+    assert pq.ParquetFile(fname).num_row_groups == 9
+    c.to_parquet_combine(fname, pipeline=True, row_group_size=25, compression='gzip')
+    assert pd.read_parquet(fname).equals(dfchk)
+    assert pq.ParquetFile(fname).num_row_groups == 2
+    assert pq.ParquetFile(fname).metadata.row_group(0).column(0).compression == 'GZIP'
+
+    def apply(dfg):
+        if len(dfg) > 3: # fail after preview
+            raise IOError('failed')
+        return dfg
+    with pytest.raises(IOError):
+        CombinerCSV(fname_list=create_files_csv_colmismatch, apply_after_read=apply).to_parquet_combine(fname, pipeline=True)
+
+
+def test_csv_stream(create_files_csv_colmismatch):
+    c = CombinerCSV(fname_list=create_files_csv_colmismatch, chunksize=4)
+    dfs = [(fname, dfc) for fname in c.fname_list for dfc in c._read_csv_yield(fname, c.read_csv_params)]
+    csvchk = ''.join(dfc.to_csv(None, index=False, header=False) for fname, dfc in dfs)
+    for size in [1, 7, 8192, -1]:
+        blocks = []
+        fbuf = d6tstack.combine_csv._CSVStream(dfs, {'index':False, 'header':False}, nrows_block=3, on_block=lambda *args: blocks.append(args))
+        text = ''
+        while True:
+            block = fbuf.read(size)
+            text += block
+            if not block or size == -1:
+                break
+        assert text == csvchk
+        assert sum(b[1] for b in blocks) == 30 and sum(b[2] for b in blocks) == len(csvchk)
+        assert [b[0] for b in blocks] == [fname for fname, dfc in dfs for i in range(0, len(dfc), 3)]
+
+    # COPY FROM STDIN
+    class CursorStub(object):
+        def __init__(self):
+            self.loaded = []
+        def copy_expert(self, sql, fbuf):
+            while True:
+                block = fbuf.read(8192)
+                if not block:
+                    break
+                self.loaded.append(block)
+        def close(self):
+            pass
+    class EngineStub(object):
+        def __init__(self):
+            self.cursor_stub = CursorStub()
+        def raw_connection(self):
+            return self
+        def cursor(self):
+            return self.cursor_stub
+        def commit(self):
+            pass
+        def close(self):
+            pass
+
+    sql_engine = EngineStub()
+    c._combine_preview_available()
+    c._stats = d6tstack.utils.CombineStats('to_psql_combine')
+    assert c._to_psql_files(sql_engine, 'testd6tstack', c.fname_list, ',')
+    csvchk = ''.join(c._astype_preview(dfc).to_csv(None, index=False, header=False) for fname, dfc in dfs)
+    assert ''.join(sql_engine.cursor_stub.loaded) == csvchk
+    assert c._stats.rows == 30 and c._stats.bytes_out == len(csvchk)
+    assert (c._stats.summary()[['convert', 'write']] > 0).all().all()
+
+
+def test_tomysql_chunked(create_files_csv_colmismatch):
+    class EngineStub(object):
+        def __init__(self):
+            self.loaded = []
+        def execute(self, sql):
+            fname = sql.split("'")[1]
+            with open(fname) as fhandle:
+                self.loaded.append(fhandle.read())
+
+    c = CombinerCSV(fname_list=create_files_csv_colmismatch, chunksize=4)
+    csvchk = ''.join(dfc.to_csv(None, index=False, header=False, na_rep='\\N') for fname in c.fname_list for dfc in c._read_csv_yield(fname, c.read_csv_params))
+    sql_engine = EngineStub()
+    c._stats = d6tstack.utils.CombineStats('to_mysql_combine')
+    assert c._to_mysql_chunked(sql_engine, 'testd6tstack', cfg_fname_base_out_dir+'/mysql.csv', ',')
+    assert len(sql_engine.loaded) > 1
+    assert ''.join(sql_engine.loaded) == csvchk
+    assert not glob.glob(cfg_fname_base_out_dir+'/mysql*.csv')
+    assert c._stats.rows == 30 and c._stats.bytes_out == len(csvchk)
+    assert (c._stats.summary()[['convert', 'write']] > 0).all().all()
+
+
+def test_tosql_sqlite(create_files_csv_colmismatch):
+    tblname = 'testd6tstack'
+    uri = 'sqlite:///'+cfg_fname_base_out_dir+'/test.db'
+    sql_engine = sqlalchemy.create_engine(uri)
+    for batch_size, method in [(None, None), (4, None), (5, 'multi')]:
+        logger = DebugLogger('to_sql_combine')
+        c = CombinerCSV(fname_list=create_files_csv_colmismatch, chunksize=4, logger=logger)
+        assert c.to_sql_combine(uri, tblname, 'replace', batch_size=batch_size, method=method)
+        df = pd.read_sql_table(tblname, sql_engine)
+        assert df.shape == (30, 4+1+2)
+        assert c.stats.rows == 30
+        assert 'rows/sec' in logger.log[-2]
+        assert df.equals(c.to_pandas().astype(df.dtypes))
+
+
+def test_tosqlite(create_files_csv_colmismatch):
+    tblname = 'testd6tstack'
+    fname_db = cfg_fname_base_out_dir+'/test-sqlite.db'
+    if os.path.exists(fname_db):
+        os.remove(fname_db)
+    sql_engine = sqlalchemy.create_engine('sqlite:///'+fname_db)
+
+    c = CombinerCSV(fname_list=create_files_csv_colmismatch, chunksize=4)
+    dfchk = c.to_pandas()
+    assert c.to_sqlite_combine(fname_db, tblname, index=['date', ['filename', 'profit']])
+    df = pd.read_sql_table(tblname, sql_engine)
+    assert df.shape == (30, 4+1+2)
+    assert df.equals(dfchk.astype(df.dtypes))
+    indexes = pd.read_sql("SELECT name FROM sqlite_master WHERE type='index'", sql_engine)['name'].tolist()
+    assert sorted(indexes) == ['ix_testd6tstack_date', 'ix_testd6tstack_filename_profit']
+    sql_engine.dispose()
+    assert pd.read_sql('PRAGMA journal_mode', sql_engine).iloc[0, 0] == 'delete' # restored after load
+    assert not os.path.exists(fname_db+'-wal')
+
+    with pytest.raises(ValueError):
+        c.to_sqlite_combine(fname_db, tblname)
+    with pytest.raises(ValueError):
+        c.to_sqlite_combine(fname_db, tblname, if_exists='skip')
+    with pytest.raises(ValueError):
+        c.to_sqlite_combine(fname_db, tblname, if_exists='append', journal_mode='WAL; DROP TABLE x')
+    assert c.to_sqlite_combine(fname_db, tblname, if_exists='append', journal_mode='OFF')
+    assert pd.read_sql_table(tblname, sql_engine).shape == (60, 4+1+2)
+    assert c.to_sqlite_combine(fname_db, tblname, if_exists='replace')
+    assert pd.read_sql_table(tblname, sql_engine).shape == (30, 4+1+2)
+
+
 def test_tosql(create_files_csv_colmismatch):
     tblname = 'testd6tstack'
 